@@ -0,0 +1,245 @@
+"""
+DXYArea 原始更新流的时点 (as-of) 查询索引
+
+原始数据中每个省份/城市有多次更新记录。建立索引时只排序一次：
+按 (省份编码, updateTime) 与 (城市, updateTime) 排序并保存为 .npz 文件；
+查询“截至时刻 T 各省份/城市的最新状态”时，把 (编码, 时间) 合成为一个
+整数键，对所有省份一次 searchsorted 二分查找即可得到结果，
+不再依赖 drop_duplicates 保留的“第一行”。
+
+用法:
+    python asof_index.py build [--raw PATH] [--index PATH]
+    python asof_index.py query 2022-12-29 [--cities] [--output PATH]
+"""
+import argparse
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+import provinces as province_dim
+
+# 原始数据与索引文件路径，可通过环境变量覆盖
+RAW_PATH = os.environ.get('COVID_RAW_PATH', r"D:\Download\DXYArea.csv")
+INDEX_PATH = os.environ.get('COVID_ASOF_INDEX', r"D:\数据可视化\数据\DXYArea_asof.npz")
+
+# 合成键 = 实体编号 * KEY_SHIFT + 秒级时间戳（2^40 秒约 3.5 万年，不会溢出到编号位）
+KEY_SHIFT = np.int64(1) << 40
+
+PROVINCE_COLUMNS = ['province_confirmedCount', 'province_curedCount', 'province_deadCount']
+CITY_COLUMNS = ['city_confirmedCount', 'city_curedCount', 'city_deadCount']
+
+AsOfIndex = namedtuple('AsOfIndex', [
+    'province_keys', 'province_values',
+    'city_keys', 'city_values', 'city_province', 'city_names',
+    'source_mtime', 'source_size',
+])
+
+_index = None
+_index_lock = threading.Lock()
+_rebuild_thread = None
+
+
+def _to_seconds(values):
+    return values.astype('datetime64[s]').astype(np.int64)
+
+
+def parse_timestamp(value):
+    """把 'YYYY-MM-DD' 或 'YYYY-MM-DD HH:MM:SS' 转换为秒级时间戳；只给日期时取当天结束时刻"""
+    value = str(value).strip().replace('/', '-').replace('_', '-')
+    if len(value) <= 10:
+        return int(_to_seconds(np.datetime64(value, 'D') + np.timedelta64(1, 'D'))) - 1
+    return int(_to_seconds(np.datetime64(value.replace(' ', 'T'), 's')))
+
+
+def _sorted_entries(entity_ids, times, values):
+    """按 (实体, 时间) 排序，同一实体同一时刻的重复记录只保留一条"""
+    keys = entity_ids.astype(np.int64) * KEY_SHIFT + times
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    keep = np.ones(len(keys), dtype=bool)
+    keep[:-1] = keys[1:] != keys[:-1]  # 重复键保留最后一条
+    return keys[keep], values[order][keep]
+
+
+def build_index(raw_path=RAW_PATH, index_path=INDEX_PATH):
+    """读取原始更新流，排序后保存索引文件"""
+    import pandas as pd
+
+    usecols = ['countryName', 'provinceName', 'cityName', 'updateTime'] + PROVINCE_COLUMNS + CITY_COLUMNS
+    df = pd.read_csv(raw_path, usecols=usecols)
+    df = df[df['countryName'] == '中国']
+
+    # 省份名称一次性转换为编码，'中国' 等非省级记录编码为 -1 后丢弃
+    codes = province_dim.to_codes(df['provinceName'], strict=False)
+    df = df[codes >= 0]
+    codes = codes[codes >= 0]
+    times = _to_seconds(pd.to_datetime(df['updateTime']).to_numpy())
+
+    province_keys, province_values = _sorted_entries(
+        codes, times, df[PROVINCE_COLUMNS].fillna(0).to_numpy(dtype=np.int64))
+
+    has_city = df['cityName'].notna().to_numpy()
+    city_frame = pd.DataFrame({'code': codes[has_city], 'city': df['cityName'].to_numpy()[has_city]})
+    city_ids, city_table = pd.MultiIndex.from_frame(city_frame).factorize()
+    city_keys, city_values = _sorted_entries(
+        city_ids, times[has_city], df[CITY_COLUMNS].fillna(0).to_numpy(dtype=np.int64)[has_city])
+
+    # 先写临时文件再替换，其它进程不会读到写了一半的索引
+    stat = os.stat(raw_path)
+    tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(
+            f,
+            province_keys=province_keys, province_values=province_values,
+            city_keys=city_keys, city_values=city_values,
+            city_province=city_table.get_level_values(0).to_numpy(dtype=np.int64),
+            city_names=city_table.get_level_values(1).to_numpy(dtype=str),
+            source_mtime=np.int64(stat.st_mtime_ns), source_size=np.int64(stat.st_size),
+        )
+    os.replace(tmp_path, index_path)
+    return load_index(index_path)
+
+
+def load_index(index_path=INDEX_PATH):
+    with np.load(index_path) as f:
+        return AsOfIndex(**{name: f[name] for name in AsOfIndex._fields})
+
+
+def index_available(index_path=INDEX_PATH):
+    return os.path.exists(index_path)
+
+
+def _is_stale(index, raw_path):
+    if not os.path.exists(raw_path):
+        return False
+    stat = os.stat(raw_path)
+    return (stat.st_mtime_ns, stat.st_size) != (index.source_mtime, index.source_size)
+
+
+def _rebuild(index_path, raw_path):
+    global _index
+    try:
+        index = build_index(raw_path, index_path)
+    except Exception as e:
+        # 原始文件可能正在写入，保留现有索引，下次请求时再试
+        print("时点索引重建失败:", e)
+        return
+    with _index_lock:
+        _index = index
+
+
+def get_index(index_path=INDEX_PATH, raw_path=RAW_PATH, wait=False):
+    """
+    返回缓存的索引。原始数据比索引更新时，wait 为 True 则同步重建（命令行与脚本），
+    否则在后台线程中重建，完成前继续返回现有索引，页面与回调请求不会被阻塞。
+    索引文件不存在时总是同步建立。
+    """
+    global _index, _rebuild_thread
+    with _index_lock:
+        if _index is None:
+            _index = load_index(index_path) if os.path.exists(index_path) else build_index(raw_path, index_path)
+        index = _index
+        if not _is_stale(index, raw_path):
+            return index
+        if not wait:
+            if _rebuild_thread is None or not _rebuild_thread.is_alive():
+                _rebuild_thread = threading.Thread(target=_rebuild, args=(index_path, raw_path),
+                                                   name='asof-index-rebuild', daemon=True)
+                _rebuild_thread.start()
+            return index
+        _index = build_index(raw_path, index_path)
+        return _index
+
+
+def _lookup(keys, entity_ids, timestamp):
+    """每个实体在 timestamp 及之前的最后一条记录的位置，没有记录的为 -1"""
+    targets = entity_ids.astype(np.int64) * KEY_SHIFT + timestamp
+    positions = np.searchsorted(keys, targets, side='right') - 1
+    found = positions >= 0
+    found[found] = keys[positions[found]] // KEY_SHIFT == entity_ids[found]
+    return np.where(found, positions, -1)
+
+
+def time_range(index):
+    """索引覆盖的时间范围 (最早, 最晚)，datetime64[s]"""
+    times = index.province_keys % KEY_SHIFT
+    return times.min().astype('datetime64[s]'), times.max().astype('datetime64[s]')
+
+
+def province_asof(index, timestamp):
+    """截至 timestamp 各省份的最新状态；除省份编码 code 外，列与 bug_data.py 输出的快照文件一致"""
+    import pandas as pd
+
+    timestamp = parse_timestamp(timestamp)
+    codes = np.arange(province_dim.N_PROVINCES)
+    positions = _lookup(index.province_keys, codes, timestamp)
+    codes, positions = codes[positions >= 0], positions[positions >= 0]
+
+    values = index.province_values[positions]
+    return pd.DataFrame({
+        'code': codes,
+        'provinceName': province_dim.FULL_NAMES[codes],
+        'province_confirmedCount': values[:, 0],
+        'province_curedCount': values[:, 1],
+        'province_deadCount': values[:, 2],
+        'updateTime': (index.province_keys[positions] % KEY_SHIFT).astype('datetime64[s]'),
+    })
+
+
+def city_asof(index, timestamp):
+    """截至 timestamp 各城市的最新状态"""
+    import pandas as pd
+
+    timestamp = parse_timestamp(timestamp)
+    city_ids = np.arange(len(index.city_names))
+    positions = _lookup(index.city_keys, city_ids, timestamp)
+    city_ids, positions = city_ids[positions >= 0], positions[positions >= 0]
+
+    values = index.city_values[positions]
+    codes = index.city_province[city_ids]
+    return pd.DataFrame({
+        'code': codes,
+        'provinceName': province_dim.FULL_NAMES[codes],
+        'cityName': index.city_names[city_ids],
+        'city_confirmedCount': values[:, 0],
+        'city_curedCount': values[:, 1],
+        'city_deadCount': values[:, 2],
+        'updateTime': (index.city_keys[positions] % KEY_SHIFT).astype('datetime64[s]'),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DXYArea 更新流的时点查询索引")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help="建立索引")
+    build.add_argument('--raw', default=RAW_PATH)
+    build.add_argument('--index', default=INDEX_PATH)
+
+    query = sub.add_parser('query', help="查询截至某一时刻的状态")
+    query.add_argument('timestamp', help="YYYY-MM-DD 或 'YYYY-MM-DD HH:MM:SS'")
+    query.add_argument('--raw', default=RAW_PATH)
+    query.add_argument('--index', default=INDEX_PATH)
+    query.add_argument('--cities', action='store_true', help="输出城市级数据")
+    query.add_argument('--output', help="保存为 CSV 文件")
+
+    args = parser.parse_args()
+    if args.command == 'build':
+        index = build_index(args.raw, args.index)
+        print(f"索引已保存到 {args.index}：{len(index.province_keys)} 条省级记录，"
+              f"{len(index.city_keys)} 条城市记录")
+        return
+
+    index = get_index(args.index, args.raw, wait=True)
+    result = city_asof(index, args.timestamp) if args.cities else province_asof(index, args.timestamp)
+    if args.output:
+        result.drop(columns='code').to_csv(args.output, index=False, encoding='utf_8_sig')
+        print("保存成功，路径：", args.output)
+    else:
+        print(result.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
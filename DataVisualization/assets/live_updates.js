@@ -0,0 +1,23 @@
+// 实时更新模式：通过 SSE 接收新增日期数据，写入 live-update-store 后由客户端回调追加到图表
+(function () {
+    function connect() {
+        const clientside = window.dash_clientside;
+        if (!document.getElementById('live-mode-flag') || !clientside || !clientside.set_props) {
+            // 页面布局尚未渲染完成时稍后再试；已渲染但未开启实时模式则不再连接
+            if (!document.getElementById('covid-chart')) {
+                setTimeout(connect, 500);
+            }
+            return;
+        }
+
+        const source = new EventSource('/live/stream');
+        source.addEventListener('snapshot', function (event) {
+            clientside.set_props('live-update-store', {data: JSON.parse(event.data)});
+        });
+        source.addEventListener('reload', function () {
+            window.location.reload();
+        });
+    }
+
+    window.addEventListener('load', connect);
+})();
@@ -19,25 +19,25 @@
 # china_df.to_csv(os.path.join(save_path, "china_data.csv"), index=False, encoding='utf_8_sig')
 # print("文件已保存到:", os.path.join(save_path, "china_data.csv"))
 
-import pandas as pd
+import sys
 
-# 原始文件路径
-input_path = r"D:\Download\20221229.csv"
+import asof_index
 
-# 输出文件路径
-output_path = r"D:\数据可视化\数据\20221229.csv"
+# 原始文件路径（DXYArea 完整更新流）
+input_path = r"D:\Download\DXYArea.csv"
 
-# 读取 CSV 文件
-df = pd.read_csv(input_path)
+# 目标日期，可通过命令行参数指定，例如: python bug_data.py 2022-12-29
+target_date = sys.argv[1] if len(sys.argv) > 1 else '2022-12-29'
 
-# 过滤出中国的数据
-china_df = df[df['countryName'] == '中国']
+# 输出文件路径
+output_path = rf"D:\数据可视化\数据\{target_date.replace('-', '')}.csv"
 
-# 只保留指定列，并去重（同一省份可能会因为不同城市多次出现）
-province_df = china_df[['provinceName', 'province_confirmedCount', 'province_curedCount', 'province_deadCount', 'updateTime']]
-province_df = province_df.drop_duplicates(subset=['provinceName'])
+# 取每个省份截至目标日期当天结束时最后一次更新的记录
+# （原先 drop_duplicates(subset=['provinceName']) 保留的是文件中最先出现的一行，不一定是最新的）
+index = asof_index.get_index(raw_path=input_path, wait=True)
+province_df = asof_index.province_asof(index, target_date)
 
 # 保存到新文件
-province_df.to_csv(output_path, index=False, encoding='utf_8_sig')
+province_df.drop(columns='code').to_csv(output_path, index=False, encoding='utf_8_sig')
 
 print("保存成功，路径：", output_path)
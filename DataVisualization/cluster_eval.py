@@ -0,0 +1,291 @@
+"""
+聚类参数评估
+
+ProvinceClustering.java 对所有日期固定使用 k=5。本脚本对每个快照日期
+（数据目录下的 YYYYMMDD.csv）扫描 k 与特征变换（raw / log / per_capita），
+在进程池中并行计算 inertia、轮廓系数 (silhouette) 与 Davies-Bouldin 指数，
+结果按文件内容哈希缓存，未变化的日期不会重复计算；每个日期的最佳配置
+（选择规则见 pick_best）写入 cluster_best_config.json。
+
+用法:
+    python cluster_eval.py [--data-dir DIR] [--k-min 2] [--k-max 8] [--workers N] [--write-clusters]
+"""
+import argparse
+import glob
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import provinces as province_dim
+
+# 快照数据目录，可通过环境变量 COVID_DATA_DIR 覆盖
+DATA_DIR = os.environ.get('COVID_DATA_DIR', r"D:\数据可视化\数据")
+
+CACHE_FILE = 'cluster_eval_cache.json'
+BEST_CONFIG_FILE = 'cluster_best_config.json'
+
+# 与 ProvinceClustering.java 相同的三个聚类特征
+FEATURE_COLUMNS = ['province_confirmedCount', 'province_curedCount', 'province_deadCount']
+TRANSFORMS = ('raw', 'log', 'per_capita')
+
+# k-means 随机初始化次数与随机种子（参与缓存键，修改后会重新计算）
+N_INIT = 10
+SEED = 0
+
+# 只含一个省份的簇视为单独的离群分级（如疫情初期的湖北），不参与簇大小检查；
+# 其余簇的省份数占非离群省份的比例低于 MIN_CLUSTER_FRACTION 的配置不参与选择，
+# 且至少要有两个非离群簇，否则只是“离群省份 vs 其余所有省份”的划分
+MIN_CLUSTER_FRACTION = 0.1
+
+
+def load_snapshot(path):
+    """读取一个快照文件，返回 (省份编码数组, 特征矩阵)"""
+    import pandas as pd
+
+    df = pd.read_csv(path, encoding='utf-8-sig')
+    df = df[df['provinceName'] != '中国']
+    df = df.dropna(subset=FEATURE_COLUMNS)
+    codes = province_dim.to_codes(df['provinceName'])
+    return codes, df[FEATURE_COLUMNS].to_numpy(dtype=float)
+
+
+def transform_features(codes, X, transform):
+    """特征变换后按列做 min-max 归一化（与 Weka SimpleKMeans 默认的距离归一化一致）"""
+    if transform == 'log':
+        X = np.log1p(X)
+    elif transform == 'per_capita':
+        X = X / province_dim.POPULATION[codes][:, None]  # 每万人
+    elif transform != 'raw':
+        raise ValueError(f"未知的特征变换: {transform}")
+
+    span = X.max(axis=0) - X.min(axis=0)
+    span[span == 0] = 1.0
+    return (X - X.min(axis=0)) / span
+
+
+def _sq_distances(X, C):
+    """所有样本到所有中心的平方距离 (n, k)"""
+    return (X * X).sum(1)[:, None] - 2 * X @ C.T + (C * C).sum(1)[None, :]
+
+
+def kmeans(X, k, n_init=N_INIT, seed=SEED, max_iter=100):
+    """k-means++ 初始化的 Lloyd 算法，返回 inertia 最小的 (labels, centers, inertia)"""
+    rng = np.random.default_rng(seed)
+    n = len(X)
+    best = None
+    for _ in range(n_init):
+        # k-means++ 初始化
+        centers = [X[rng.integers(n)]]
+        for _ in range(1, k):
+            d2 = np.maximum(_sq_distances(X, np.array(centers)).min(1), 0)
+            total = d2.sum()
+            idx = rng.choice(n, p=d2 / total) if total > 0 else rng.integers(n)
+            centers.append(X[idx])
+        centers = np.array(centers)
+
+        for _ in range(max_iter):
+            d2 = _sq_distances(X, centers)
+            labels = d2.argmin(1)
+            onehot = np.eye(k)[labels]
+            counts = onehot.sum(0)
+            new_centers = (onehot.T @ X) / np.maximum(counts, 1)[:, None]
+            # 空簇用离当前中心最远的样本重新初始化
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                far = np.argsort(d2[np.arange(n), labels])[::-1][:len(empty)]
+                new_centers[empty] = X[far]
+            if np.allclose(new_centers, centers):
+                break
+            centers = new_centers
+
+        d2 = _sq_distances(X, centers)
+        labels = d2.argmin(1)
+        inertia = float(np.maximum(d2[np.arange(n), labels], 0).sum())
+        if best is None or inertia < best[2]:
+            best = (labels, centers, inertia)
+    return best
+
+
+def silhouette_score(X, labels):
+    """轮廓系数：用成对距离矩阵与 one-hot 矩阵乘法一次算出所有样本到各簇的平均距离"""
+    D = np.sqrt(np.maximum(_sq_distances(X, X), 0))
+    k = labels.max() + 1
+    onehot = np.eye(k)[labels]
+    counts = onehot.sum(0)
+    sums = D @ onehot  # (n, k) 到每个簇的距离之和
+
+    own = counts[labels] - 1
+    a = np.where(own > 0, sums[np.arange(len(X)), labels] / np.maximum(own, 1), 0)
+    other = np.where(onehot.astype(bool) | (counts == 0)[None, :], np.inf, sums / np.maximum(counts, 1))
+    b = other.min(1)
+
+    s = np.where(own > 0, (b - a) / np.maximum(np.maximum(a, b), 1e-12), 0)
+    return float(s.mean())
+
+
+def davies_bouldin_score(X, labels, centers):
+    k = len(centers)
+    onehot = np.eye(k)[labels]
+    counts = onehot.sum(0)
+    spread = (onehot * np.sqrt(np.maximum(_sq_distances(X, centers), 0))).sum(0) / np.maximum(counts, 1)
+    M = np.sqrt(np.maximum(_sq_distances(centers, centers), 0))
+    np.fill_diagonal(M, np.inf)
+    ratio = (spread[:, None] + spread[None, :]) / np.where(M > 0, M, 1e-12)
+    return float(ratio.max(1).mean())
+
+
+def config_key(transform, k):
+    return f"{transform}-k{k}"
+
+
+def evaluate_snapshot(path, k_values, transforms=TRANSFORMS):
+    """在一个快照上评估所有 (变换, k) 组合，供进程池调用"""
+    codes, X = load_snapshot(path)
+    spaces = {transform: transform_features(codes, X, transform) for transform in TRANSFORMS}
+    results = {}
+    for transform in transforms:
+        Xt = spaces[transform]
+        for k in k_values:
+            if k >= len(Xt):
+                continue
+            labels, centers, inertia = kmeans(Xt, k)
+            results[config_key(transform, k)] = {
+                'transform': transform,
+                'k': k,
+                'inertia': inertia,
+                'cluster_sizes': np.bincount(labels, minlength=k).tolist(),
+                'silhouette': silhouette_score(Xt, labels),
+                # 同一划分在所有特征空间中的平均轮廓系数，不同变换之间可以直接比较
+                'silhouette_cross': float(np.mean([silhouette_score(Xs, labels) for Xs in spaces.values()])),
+                'davies_bouldin': davies_bouldin_score(Xt, labels, centers),
+            }
+    return results
+
+
+def _admissible(r, min_cluster_fraction):
+    sizes = [size for size in r['cluster_sizes'] if size > 1]
+    return len(sizes) >= 2 and min(sizes) >= math.ceil(sum(sizes) * min_cluster_fraction)
+
+
+def pick_best(results, min_cluster_fraction=MIN_CLUSTER_FRACTION):
+    """
+    选择规则：
+    1. 单省份的簇作为离群分级保留；其余簇中最小簇的省份数少于非离群省份总数 ×
+       min_cluster_fraction（向上取整），或非离群簇不足两个的配置排除；
+    2. 每种特征变换内部，在各自的特征空间中比较轮廓系数选出 k（相同时取 Davies-Bouldin 更小者）；
+    3. 不同变换的轮廓系数来自不同的特征空间，不能直接比较，改用 silhouette_cross
+       （该划分在所有特征空间中的平均轮廓系数）在各变换的候选之间选出最佳。
+    没有配置满足第 1 条时，退回到 silhouette_cross 最高的配置，并标记 fallback 为 True。
+    返回的配置附带 outliers（离群分级个数）与 fallback 两个字段。
+    """
+    candidates = {}
+    for r in results.values():
+        if not _admissible(r, min_cluster_fraction):
+            continue
+        best = candidates.get(r['transform'])
+        if best is None or (round(r['silhouette'], 6), -r['davies_bouldin']) > \
+                (round(best['silhouette'], 6), -best['davies_bouldin']):
+            candidates[r['transform']] = r
+
+    fallback = not candidates
+    choice = max((results.values() if fallback else candidates.values()), key=lambda r: r['silhouette_cross'])
+    return dict(choice, outliers=sum(size == 1 for size in choice['cluster_sizes']), fallback=fallback)
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def snapshot_files(data_dir):
+    """数据目录下的 YYYYMMDD.csv 快照，按日期排序"""
+    paths = glob.glob(os.path.join(data_dir, '[0-9]' * 8 + '.csv'))
+    return {os.path.basename(path)[:8]: path for path in sorted(paths)}
+
+
+def _load_json(path):
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def _save_json(obj, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+
+
+def write_clusters(path, output_path, transform, k):
+    """按最佳配置重新聚类并输出与 ProvinceClustering.java 相同格式的结果"""
+    codes, X = load_snapshot(path)
+    labels, _, _ = kmeans(transform_features(codes, X, transform), k)
+
+    # 按簇平均确诊数升序重新编号（1 ~ k，风险高的编号大）
+    mean_confirmed = [X[labels == c, 0].mean() if (labels == c).any() else -1 for c in range(k)]
+    cluster_map = {old: new + 1 for new, old in enumerate(np.argsort(mean_confirmed))}
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("Province,Cluster,Confirmed,Cured,Dead\n")
+        for name, label, (confirmed, cured, dead) in zip(province_dim.NAMES[codes], labels, X):
+            f.write(f"{name},{cluster_map[label]},{int(confirmed)},{int(cured)},{int(dead)}\n")
+
+
+def run(data_dir=DATA_DIR, k_values=range(2, 9), workers=None, write=False):
+    """评估所有快照并保存最佳配置，返回 {日期: 最佳配置}"""
+    k_values = list(k_values)
+    cache_path = os.path.join(data_dir, CACHE_FILE)
+    cache = _load_json(cache_path)
+    files = snapshot_files(data_dir)
+
+    # 只为内容或参数发生变化的日期提交计算任务
+    params = {'k_values': k_values, 'transforms': list(TRANSFORMS), 'n_init': N_INIT, 'seed': SEED,
+              'metrics': ['silhouette', 'silhouette_cross', 'davies_bouldin']}
+    pending = {}
+    for date, path in files.items():
+        digest = file_hash(path)
+        entry = cache.get(date)
+        if entry is None or entry.get('hash') != digest or entry.get('params') != params:
+            pending[date] = (path, digest)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {date: pool.submit(evaluate_snapshot, path, k_values) for date, (path, _) in pending.items()}
+            for date, future in futures.items():
+                cache[date] = {'hash': pending[date][1], 'params': params, 'results': future.result()}
+        _save_json(cache, cache_path)
+
+    best = {}
+    for date, path in files.items():
+        choice = pick_best(cache[date]['results'])
+        best[date] = choice
+        if write:
+            write_clusters(path, os.path.join(data_dir, f"{date}_clustered.csv"), choice['transform'], choice['k'])
+
+    _save_json(best, os.path.join(data_dir, BEST_CONFIG_FILE))
+    print(f"已评估 {len(files)} 个快照（重新计算 {len(pending)} 个）")
+    for date, choice in best.items():
+        note = "  （所有配置都存在过小的簇，退回 silhouette_cross 最高者）" if choice['fallback'] else ""
+        print(f"  {date}: {choice['transform']:<10s} k={choice['k']}  sizes={choice['cluster_sizes']}  "
+              f"silhouette={choice['silhouette']:.3f}  cross={choice['silhouette_cross']:.3f}  "
+              f"davies_bouldin={choice['davies_bouldin']:.3f}{note}")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="扫描各快照日期的聚类参数并保存最佳配置")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="快照 CSV 所在目录")
+    parser.add_argument('--k-min', type=int, default=2)
+    parser.add_argument('--k-max', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认为 CPU 核数")
+    parser.add_argument('--write-clusters', action='store_true',
+                        help="按最佳配置重写 YYYYMMDD_clustered.csv")
+    args = parser.parse_args()
+    run(args.data_dir, range(args.k_min, args.k_max + 1), args.workers, args.write_clusters)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,29 +1,12 @@
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import dash
-from dash import dcc, html, Input, Output, State
-import dash_bootstrap_components as dbc
+import os
 
-# Load the data
-file_path = r"D:\数据可视化\数据\merged_province_data.csv"
-df = pd.read_csv(file_path)
+import data_store
+import provinces as province_dim
+from data_store import get_data, timed_phase
 
-# Process the data
-# Convert column names to readable dates
-date_columns = [col for col in df.columns if col != 'Province']
-time_points = sorted(
-    list(set([col.split('_')[0] + '_' + col.split('_')[1] + '_' + col.split('_')[2] for col in date_columns])))
-
-# Create dictionaries to map original columns to readable names
-confirmed_cols = {date: f"{date}_Confirmed" for date in time_points}
-death_cols = {date: f"{date}_Dead" for date in time_points}
-
-# Prepare data for visualization
-provinces = sorted(df['Province'].unique())
-
-# Initialize the Dash app with a modern theme
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.FLATLY])
+# Dash / pandas / Plotly 等重依赖以及依赖 NumPy 的功能模块（asof_index、data_api、forecast、
+# live_updates）在 create_app() 和各回调中按需导入，数据由 data_store 在首次访问或
+# 后台线程中加载，以缩短进程冷启动时间
 
 # Define custom styles
 COLORS = {
@@ -37,7 +20,7 @@ COLORS = {
 }
 
 # Custom CSS
-app.index_string = '''
+INDEX_STRING = '''
 <!DOCTYPE html>
 <html>
     <head>
@@ -110,120 +93,218 @@ app.index_string = '''
 </html>
 '''
 
-# Define the layout with styled components
-# Define the layout with styled components
-app.layout = dbc.Container([
-    dbc.Row([
-        dbc.Col(html.Div([
-            html.H1("中国新冠疫情数据可视化", className="text-center"),
-            html.P("交互式仪表板 - 选择省份、图表类型和时间范围进行数据探索", className="text-center text-light")
-        ], className="header"), width=12)
-    ]),
-
-    dbc.Row([
-        dbc.Col([
-            dbc.Row([
-                dbc.Col(html.H1("中国新冠疫情数据可视化", className="text-center mt-4 mb-4"), width=12)
-            ]),
-
-            dbc.Row([
-                dbc.Col([
-                    html.Div([
-                        html.H4("控制面板", className="mb-4 text-primary"),
-                        dbc.Row([
-                            dbc.Col([
-                                html.H5("选择省份:", className="mb-2"),
-                                dcc.Dropdown(
-                                    id='province-dropdown',
-                                    options=[{'label': province, 'value': province} for province in provinces],
-                                    value=provinces[:5],  # Default to first 5 provinces
-                                    multi=True,
-                                    style={"borderRadius": "8px"}
-                                ),
-                            ], width=12, className="mb-4"),
-
-                            dbc.Col([
-                                html.H5("选择图表类型:", className="mb-2"),
-                                dcc.RadioItems(
-                                    id='chart-type',
-                                    options=[
-                                        {'label': '确诊病例折线图', 'value': 'line-confirmed'},
-                                        {'label': '死亡病例折线图', 'value': 'line-dead'},
-                                        {'label': '确诊病例柱状图', 'value': 'bar-confirmed'},
-                                        {'label': '死亡病例柱状图', 'value': 'bar-dead'},
-                                        {'label': '热力图 (所有省份)', 'value': 'heatmap'},
-                                        {'label': '致死率分析', 'value': 'mortality-rate'},
-                                        {'label': '增长率图', 'value': 'growth-rate'},
-                                        {'label': '确诊/死亡散点图', 'value': 'scatter'},
-                                        {'label': '数据占比饼图', 'value': 'pie'},
-                                    ],
-                                    value='line-confirmed',
-                                    labelStyle={'display': 'block', 'margin': '8px 0', 'cursor': 'pointer'},
-                                    inputStyle={"marginRight": "10px"},
-                                    className="radio-items"
-                                ),
-                            ], width=12, className="mb-4"),
-
-                            dbc.Col([
-                                html.H5("选择时间范围:", className="mb-2"),
-                                dcc.RangeSlider(
-                                    id='time-slider',
-                                    min=0,
-                                    max=len(time_points) - 1,
-                                    step=1,
-                                    marks={i: {"label": time_points[i].replace('_', '/'),
-                                               "style": {"transform": "rotate(45deg)", "white-space": "nowrap"}}
-                                           for i in range(0, len(time_points), max(1, len(time_points) // 8))},
-                                    value=[0, len(time_points) - 1],  # Default to all time points
-                                    tooltip={"placement": "bottom", "always_visible": True}
-                                ),
-                            ], width=12),
-                        ]),
-                    ], className="control-panel"),
-                ], width=12),
-            ]),
-
-            dbc.Row([
-                dbc.Col([
-                    html.Div([
-                        dcc.Graph(id='covid-chart', style={"height": "600px"})
-                    ], className="chart-card")
-                ], width=12, className="mb-4"),
-            ]),
-
-            dbc.Row([
-                dbc.Col([
-                    html.Div([
-                        html.H4("比较分析图表", className="mb-3 text-primary"),
-                        dcc.Graph(id='additional-chart', style={"height": "500px"})
-                    ], className="chart-card")
-                ], width=12, className="mb-4"),
-            ]),
-
-            dbc.Row([
-                dbc.Col([
-                    html.Div([
-                        html.H4("数据表格", className="mb-3 text-primary"),
-                        html.Div(id='data-table')
-                    ], className="table-container")
-                ], width=12, className="mb-4"),
-            ]),
-        ], width=12)
+
+def serve_layout(live=False, asof=False):
+    """页面请求时生成布局；数据尚未加载完成时返回加载中页面，不阻塞请求"""
+    if not data_store.is_ready():
+        data_store.start_background_load()
+        return loading_layout()
+
+    import asof_index
+
+    data = get_data()
+    asof_range = asof_index.time_range(asof_index.get_index()) if asof else None
+    return dashboard_layout(data.provinces, data.time_points, live=live, asof_range=asof_range)
+
+
+def validation_layout(live=False, asof=False):
+    """供回调校验使用的完整布局骨架，不依赖数据"""
+    from dash import html
+
+    return html.Div([
+        dashboard_layout([], [], live=live, asof_range=(None, None) if asof else None),
+        loading_layout(),
     ])
-], fluid=True)
 
 
-# Define callback to update main chart
-@app.callback(
-    Output('covid-chart', 'figure'),
-    [Input('province-dropdown', 'value'),
-     Input('chart-type', 'value'),
-     Input('time-slider', 'value')]
-)
+def loading_layout():
+    """数据加载中的占位页面，由客户端定时检查 /readyz，就绪后刷新页面"""
+    import dash_bootstrap_components as dbc
+    from dash import dcc, html
+
+    error = data_store.load_error()
+    message = f"数据加载失败：{error}" if error is not None else "数据加载中，请稍候……"
+
+    return dbc.Container([
+        html.Div([
+            html.H1("中国新冠疫情数据可视化", className="text-center"),
+            html.P(message, className="text-center text-light", id='loading-message')
+        ], className="header"),
+        dcc.Interval(id='loading-poll', interval=1000),
+    ], fluid=True)
+
+
+def time_slider_marks(time_points):
+    return {i: {"label": time_points[i].replace('_', '/'),
+                "style": {"transform": "rotate(45deg)", "white-space": "nowrap"}}
+            for i in range(0, len(time_points), max(1, len(time_points) // 8))}
+
+
+# Define the layout with styled components
+def dashboard_layout(provinces, time_points, live=False, asof_range=None):
+    import dash_bootstrap_components as dbc
+    from dash import dcc, html
+
+    layout = dbc.Container([
+        dbc.Row([
+            dbc.Col(html.Div([
+                html.H1("中国新冠疫情数据可视化", className="text-center"),
+                html.P("交互式仪表板 - 选择省份、图表类型和时间范围进行数据探索", className="text-center text-light")
+            ], className="header"), width=12)
+        ]),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Row([
+                    dbc.Col(html.H1("中国新冠疫情数据可视化", className="text-center mt-4 mb-4"), width=12)
+                ]),
+
+                dbc.Row([
+                    dbc.Col([
+                        html.Div([
+                            html.H4("控制面板", className="mb-4 text-primary"),
+                            dbc.Row([
+                                dbc.Col([
+                                    html.H5("选择省份:", className="mb-2"),
+                                    dcc.Dropdown(
+                                        id='province-dropdown',
+                                        options=[{'label': province, 'value': province} for province in provinces],
+                                        value=provinces[:5],  # Default to first 5 provinces
+                                        multi=True,
+                                        style={"borderRadius": "8px"}
+                                    ),
+                                ], width=12, className="mb-4"),
+
+                                dbc.Col([
+                                    html.H5("选择图表类型:", className="mb-2"),
+                                    dcc.RadioItems(
+                                        id='chart-type',
+                                        options=[
+                                            {'label': '确诊病例折线图', 'value': 'line-confirmed'},
+                                            {'label': '死亡病例折线图', 'value': 'line-dead'},
+                                            {'label': '确诊病例柱状图', 'value': 'bar-confirmed'},
+                                            {'label': '死亡病例柱状图', 'value': 'bar-dead'},
+                                            {'label': '热力图 (所有省份)', 'value': 'heatmap'},
+                                            {'label': '致死率分析', 'value': 'mortality-rate'},
+                                            {'label': '增长率图', 'value': 'growth-rate'},
+                                            {'label': '确诊/死亡散点图', 'value': 'scatter'},
+                                            {'label': '数据占比饼图', 'value': 'pie'},
+                                            {'label': '确诊病例短期预测', 'value': 'forecast'},
+                                        ],
+                                        value='line-confirmed',
+                                        labelStyle={'display': 'block', 'margin': '8px 0', 'cursor': 'pointer'},
+                                        inputStyle={"marginRight": "10px"},
+                                        className="radio-items"
+                                    ),
+                                ], width=12, className="mb-4"),
+
+                                dbc.Col([
+                                    html.H5("选择时间范围:", className="mb-2"),
+                                    dcc.RangeSlider(
+                                        id='time-slider',
+                                        min=0,
+                                        max=len(time_points) - 1,
+                                        step=1,
+                                        marks=time_slider_marks(time_points),
+                                        value=[0, len(time_points) - 1],  # Default to all time points
+                                        tooltip={"placement": "bottom", "always_visible": True}
+                                    ),
+                                ], width=12),
+                            ]),
+                        ], className="control-panel"),
+                    ], width=12),
+                ]),
+
+                dbc.Row([
+                    dbc.Col([
+                        html.Div([
+                            dcc.Graph(id='covid-chart', style={"height": "600px"})
+                        ], className="chart-card")
+                    ], width=12, className="mb-4"),
+                ]),
+
+                dbc.Row([
+                    dbc.Col([
+                        html.Div([
+                            html.H4("比较分析图表", className="mb-3 text-primary"),
+                            dcc.Graph(id='additional-chart', style={"height": "500px"})
+                        ], className="chart-card")
+                    ], width=12, className="mb-4"),
+                ]),
+
+                dbc.Row([
+                    dbc.Col([
+                        html.Div([
+                            html.H4("数据表格", className="mb-3 text-primary"),
+                            html.Div(id='data-table')
+                        ], className="table-container")
+                    ], width=12, className="mb-4"),
+                ]),
+            ], width=12)
+        ])
+    ], fluid=True)
+
+    if asof_range is not None:
+        layout.children.extend(asof_components(*asof_range))
+    if live:
+        import live_updates
+
+        layout.children.extend(live_updates.layout_components())
+
+    return layout
+
+
+def asof_components(first, last):
+    """任意日期查询：基于 DXYArea 更新流的时点索引，first/last 为索引覆盖的时间范围"""
+    import dash_bootstrap_components as dbc
+    from dash import dcc, html
+
+    return [
+        dbc.Row([
+            dbc.Col([
+                html.Div([
+                    html.H4("任意日期查询", className="mb-3 text-primary"),
+                    dcc.DatePickerSingle(
+                        id='asof-date',
+                        min_date_allowed=str(first)[:10] if first is not None else None,
+                        max_date_allowed=str(last)[:10] if last is not None else None,
+                        date=str(last)[:10] if last is not None else None,
+                        display_format='YYYY/MM/DD'
+                    ),
+                    dcc.Graph(id='asof-chart', style={"height": "500px"})
+                ], className="chart-card")
+            ], width=12, className="mb-4"),
+        ])
+    ]
+
+
+def selected_rows(data, selected_provinces):
+    """所选省份名称一次性转换为编码，再按编码映射为数据中的行号，返回 (行号, 省份名称)"""
+    rows = province_dim.join_index(province_dim.to_codes(selected_provinces), data.codes)
+    rows = rows[rows >= 0]
+    return rows, province_dim.NAMES[data.codes[rows]]
+
+
+def column_values(data, columns, rows):
+    """按行号取出若干列，(所选省份数, 列数) 矩阵"""
+    return data.df[columns].to_numpy()[rows]
+
+
+# Callback to update main chart
 def update_chart(selected_provinces, chart_type, time_range):
     if not selected_provinces and chart_type != 'heatmap':
         return {}
 
+    import numpy as np
+    import pandas as pd
+    import plotly.express as px
+
+    data = get_data()
+    df = data.df
+    time_points = data.time_points
+    confirmed_cols = data.confirmed_cols
+    death_cols = data.death_cols
+
     # Filter time points based on range slider
     selected_time_points = time_points[time_range[0]:time_range[1] + 1]
 
@@ -258,22 +339,20 @@ def update_chart(selected_provinces, chart_type, time_range):
     elif chart_type == 'mortality-rate':
         # Create mortality rate chart
         mortality_data = []
-        for province in selected_provinces:
-            province_data = df[df['Province'] == province]
+        rows, names = selected_rows(data, selected_provinces)
+        confirmed_values = column_values(data, [confirmed_cols[date] for date in selected_time_points], rows)
+        death_values = column_values(data, [death_cols[date] for date in selected_time_points], rows)
 
-            if len(province_data) > 0:
-                for date in selected_time_points:
-                    confirmed = province_data[confirmed_cols[date]].values[0]
-                    deaths = province_data[death_cols[date]].values[0]
+        for province, confirmed_row, death_row in zip(names, confirmed_values, death_values):
+            for date, confirmed, deaths in zip(selected_time_points, confirmed_row, death_row):
+                # Calculate mortality rate (avoid division by zero)
+                mortality_rate = (deaths / confirmed * 100) if confirmed > 0 else 0
 
-                    # Calculate mortality rate (avoid division by zero)
-                    mortality_rate = (deaths / confirmed * 100) if confirmed > 0 else 0
-
-                    mortality_data.append({
-                        'Province': province,
-                        'Date': date.replace('_', '/'),
-                        'MortalityRate': mortality_rate
-                    })
+                mortality_data.append({
+                    'Province': province,
+                    'Date': date.replace('_', '/'),
+                    'MortalityRate': mortality_rate
+                })
 
         df_mortality = pd.DataFrame(mortality_data)
 
@@ -296,27 +375,24 @@ def update_chart(selected_provinces, chart_type, time_range):
     elif chart_type == 'growth-rate':
         # Create growth rate chart
         growth_data = []
+        rows, names = selected_rows(data, selected_provinces)
+        # Get confirmed cases for each date
+        confirmed_matrix = column_values(data, [confirmed_cols[date] for date in selected_time_points], rows)
 
-        for province in selected_provinces:
-            province_data = df[df['Province'] == province]
-
-            if len(province_data) > 0:
-                # Get confirmed cases for each date
-                confirmed_values = [province_data[confirmed_cols[date]].values[0] for date in selected_time_points]
+        for province, confirmed_values in zip(names, confirmed_matrix):
+            # Calculate growth rates
+            for i in range(1, len(confirmed_values)):
+                prev_value = confirmed_values[i - 1]
+                curr_value = confirmed_values[i]
 
-                # Calculate growth rates
-                for i in range(1, len(confirmed_values)):
-                    prev_value = confirmed_values[i - 1]
-                    curr_value = confirmed_values[i]
+                # Calculate percentage growth
+                growth_pct = ((curr_value - prev_value) / prev_value * 100) if prev_value > 0 else 0
 
-                    # Calculate percentage growth
-                    growth_pct = ((curr_value - prev_value) / prev_value * 100) if prev_value > 0 else 0
-
-                    growth_data.append({
-                        'Province': province,
-                        'Date': selected_time_points[i].replace('_', '/'),
-                        'GrowthRate': growth_pct
-                    })
+                growth_data.append({
+                    'Province': province,
+                    'Date': selected_time_points[i].replace('_', '/'),
+                    'GrowthRate': growth_pct
+                })
 
         df_growth = pd.DataFrame(growth_data)
 
@@ -340,21 +416,18 @@ def update_chart(selected_provinces, chart_type, time_range):
     elif chart_type == 'scatter':
         # Create scatter plot of confirmed vs deaths
         scatter_data = []
+        rows, names = selected_rows(data, selected_provinces)
+        confirmed_values = column_values(data, [confirmed_cols[date] for date in selected_time_points], rows)
+        death_values = column_values(data, [death_cols[date] for date in selected_time_points], rows)
 
-        for province in selected_provinces:
-            province_data = df[df['Province'] == province]
-
-            if len(province_data) > 0:
-                for date in selected_time_points:
-                    confirmed = province_data[confirmed_cols[date]].values[0]
-                    deaths = province_data[death_cols[date]].values[0]
-
-                    scatter_data.append({
-                        'Province': province,
-                        'Date': date.replace('_', '/'),
-                        'Confirmed': confirmed,
-                        'Deaths': deaths
-                    })
+        for province, confirmed_row, death_row in zip(names, confirmed_values, death_values):
+            for date, confirmed, deaths in zip(selected_time_points, confirmed_row, death_row):
+                scatter_data.append({
+                    'Province': province,
+                    'Date': date.replace('_', '/'),
+                    'Confirmed': confirmed,
+                    'Deaths': deaths
+                })
 
         df_scatter = pd.DataFrame(scatter_data)
 
@@ -382,19 +455,11 @@ def update_chart(selected_provinces, chart_type, time_range):
         # Create pie chart for last selected time point
         last_time_point = selected_time_points[-1]
 
-        pie_data = []
-        for province in selected_provinces:
-            province_data = df[df['Province'] == province]
-
-            if len(province_data) > 0:
-                confirmed = province_data[confirmed_cols[last_time_point]].values[0]
-
-                pie_data.append({
-                    'Province': province,
-                    'Confirmed': confirmed
-                })
-
-        df_pie = pd.DataFrame(pie_data)
+        rows, names = selected_rows(data, selected_provinces)
+        df_pie = pd.DataFrame({
+            'Province': names,
+            'Confirmed': column_values(data, [confirmed_cols[last_time_point]], rows)[:, 0]
+        })
 
         # Sort by value
         df_pie = df_pie.sort_values('Confirmed', ascending=False)
@@ -418,30 +483,85 @@ def update_chart(selected_provinces, chart_type, time_range):
 
         return fig
 
-    # Regular chart types
-    chart_data = []
+    elif chart_type == 'forecast':
+        import plotly.graph_objects as go
+
+        import forecast
+
+        # 拟合使用截至时间范围终点的最近 WINDOW 个快照，太少时无法估计预测区间
+        n_snapshots = min(time_range[1] + 1, forecast.WINDOW)
+        if n_snapshots < forecast.MIN_SNAPSHOTS:
+            fig = go.Figure()
+            fig.update_layout(
+                title="中国各省份确诊病例短期预测",
+                xaxis=dict(visible=False),
+                yaxis=dict(visible=False),
+                annotations=[dict(
+                    text=f"短期预测至少需要 {forecast.MIN_SNAPSHOTS} 个快照，当前时间范围截至第 {time_range[1] + 1} 个快照，"
+                         f"请把时间范围的终点向后移动",
+                    xref='paper', yref='paper', x=0.5, y=0.5, showarrow=False, font=dict(size=16)
+                )]
+            )
+            return fig
+
+        # Fit all provinces at once (cached per data version), then pick the selected ones
+        result = forecast.province_forecast(data, 'confirmed', end=time_range[1])
+        rows, names = selected_rows(data, selected_provinces)
+
+        history_dates = [date.replace('_', '-') for date in selected_time_points]
+        histories = column_values(data, [confirmed_cols[date] for date in selected_time_points], rows)
+        palette = px.colors.qualitative.Plotly
+
+        fig = go.Figure()
+        for i, (province, row, history) in enumerate(zip(names, rows, histories.tolist())):
+            color = palette[i % len(palette)]
+            future_x = history_dates[-1:] + result.dates
+
+            # 95% prediction band
+            fig.add_trace(go.Scatter(
+                x=future_x + future_x[::-1],
+                y=history[-1:] + result.upper[row].tolist() + result.lower[row].tolist()[::-1] + history[-1:],
+                fill='toself', fillcolor=color, opacity=0.2, line=dict(width=0),
+                hoverinfo='skip', showlegend=False, legendgroup=province
+            ))
+            fig.add_trace(go.Scatter(
+                x=history_dates, y=history, mode='lines+markers', name=province,
+                line=dict(color=color), legendgroup=province
+            ))
+            fig.add_trace(go.Scatter(
+                x=future_x, y=history[-1:] + result.mean[row].tolist(), mode='lines+markers',
+                name=f"{province} (预测, 日增长 {result.daily_growth[row] * 100:.2f}%)",
+                line=dict(color=color, dash='dash'), legendgroup=province
+            ))
 
-    for province in selected_provinces:
-        province_data = df[df['Province'] == province]
+        fig.update_layout(
+            title="中国各省份确诊病例短期预测 (对数线性增长模型, 95% 预测区间)",
+            xaxis_title='日期',
+            yaxis_title='确诊病例数',
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            margin=dict(l=40, r=40, t=60, b=60)
+        )
 
-        if 'confirmed' in chart_type:
-            data_type = 'confirmed'
-            y_title = '确诊病例数'
-            columns = [confirmed_cols[date] for date in selected_time_points]
-        else:  # 'dead'
-            data_type = 'dead'
-            y_title = '死亡病例数'
-            columns = [death_cols[date] for date in selected_time_points]
+        return fig
 
-        if len(province_data) > 0:
-            row_data = province_data[['Province'] + columns].iloc[0]
+    # Regular chart types
+    chart_data = []
 
-            for date, col in zip(selected_time_points, columns):
-                chart_data.append({
-                    'Province': row_data['Province'],
-                    'Date': date.replace('_', '/'),
-                    'Value': row_data[col]
-                })
+    if 'confirmed' in chart_type:
+        y_title = '确诊病例数'
+        columns = [confirmed_cols[date] for date in selected_time_points]
+    else:  # 'dead'
+        y_title = '死亡病例数'
+        columns = [death_cols[date] for date in selected_time_points]
+
+    rows, names = selected_rows(data, selected_provinces)
+    for province, values in zip(names, column_values(data, columns, rows)):
+        for date, value in zip(selected_time_points, values):
+            chart_data.append({
+                'Province': province,
+                'Date': date.replace('_', '/'),
+                'Value': value
+            })
 
     df_plot = pd.DataFrame(chart_data)
 
@@ -475,16 +595,30 @@ def update_chart(selected_provinces, chart_type, time_range):
     return fig
 
 
-# Define callback for additional chart
-@app.callback(
-    Output('additional-chart', 'figure'),
-    [Input('province-dropdown', 'value'),
-     Input('time-slider', 'value')]
-)
+def update_chart_live(selected_provinces, chart_type, time_range, extended_range):
+    """实时模式下的主图回调：时间滑块因推送而后移时，折线图/柱状图已由 extendData 追加了新数据点，不再整体重绘"""
+    from dash import ctx, no_update
+
+    import live_updates
+
+    if (extended_range == time_range and ctx.triggered_id == 'time-slider'
+            and chart_type in live_updates.EXTENDABLE_CHART_TYPES):
+        return no_update, None
+    return update_chart(selected_provinces, chart_type, time_range), None
+
+
+# Callback for additional chart
 def update_additional_chart(selected_provinces, time_range):
     if not selected_provinces:
         return {}
 
+    import pandas as pd
+    import plotly.express as px
+
+    data = get_data()
+    time_points = data.time_points
+    confirmed_cols = data.confirmed_cols
+
     # Filter time points based on range slider
     selected_time_points = time_points[time_range[0]:time_range[1] + 1]
     first_time = selected_time_points[0]
@@ -492,23 +626,19 @@ def update_additional_chart(selected_provinces, time_range):
 
     # Prepare data for visualization - comparing first and last time point
     comparison_data = []
+    rows, names = selected_rows(data, selected_provinces)
+    values = column_values(data, [confirmed_cols[first_time], confirmed_cols[last_time]], rows)
 
-    for province in selected_provinces:
-        province_data = df[df['Province'] == province]
+    for province, (first_confirmed, last_confirmed) in zip(names, values):
+        # Calculate percentage change
+        pct_change = ((last_confirmed - first_confirmed) / first_confirmed * 100) if first_confirmed > 0 else 0
 
-        if len(province_data) > 0:
-            first_confirmed = province_data[confirmed_cols[first_time]].values[0]
-            last_confirmed = province_data[confirmed_cols[last_time]].values[0]
-
-            # Calculate percentage change
-            pct_change = ((last_confirmed - first_confirmed) / first_confirmed * 100) if first_confirmed > 0 else 0
-
-            comparison_data.append({
-                'Province': province,
-                'FirstConfirmed': first_confirmed,
-                'LastConfirmed': last_confirmed,
-                'PercentageChange': pct_change
-            })
+        comparison_data.append({
+            'Province': province,
+            'FirstConfirmed': first_confirmed,
+            'LastConfirmed': last_confirmed,
+            'PercentageChange': pct_change
+        })
 
     df_comparison = pd.DataFrame(comparison_data)
 
@@ -539,16 +669,20 @@ def update_additional_chart(selected_provinces, time_range):
     return fig
 
 
-# Define callback to update data table
-@app.callback(
-    Output('data-table', 'children'),
-    [Input('province-dropdown', 'value'),
-     Input('time-slider', 'value')]
-)
+# Callback to update data table
 def update_table(selected_provinces, time_range):
+    import dash_bootstrap_components as dbc
+    from dash import html
+
     if not selected_provinces:
         return html.Div("请选择至少一个省份")
 
+    data = get_data()
+    df = data.df
+    time_points = data.time_points
+    confirmed_cols = data.confirmed_cols
+    death_cols = data.death_cols
+
     # Filter time points based on range slider
     selected_time_points = time_points[time_range[0]:time_range[1] + 1]
 
@@ -556,8 +690,9 @@ def update_table(selected_provinces, time_range):
     confirmed_columns = [confirmed_cols[date] for date in selected_time_points]
     death_columns = [death_cols[date] for date in selected_time_points]
 
-    # Filter dataframe
-    filtered_df = df[df['Province'].isin(selected_provinces)][['Province'] + confirmed_columns + death_columns]
+    # Select rows by province code
+    rows, _ = selected_rows(data, selected_provinces)
+    filtered_df = df.iloc[rows][['Province'] + confirmed_columns + death_columns]
 
     # Create table
     table_header = [
@@ -580,5 +715,161 @@ def update_table(selected_provinces, time_range):
     return dbc.Table(table_header + table_body, bordered=True, striped=True, hover=True, responsive=True)
 
 
+# Callback for the as-of query chart
+def update_asof_chart(date):
+    if not date:
+        return {}
+
+    import plotly.express as px
+
+    import asof_index
+
+    df_asof = asof_index.province_asof(asof_index.get_index(), date[:10])
+    df_asof['Province'] = province_dim.NAMES[df_asof['code'].to_numpy()]
+    df_asof = df_asof.sort_values('province_confirmedCount', ascending=False)
+
+    fig = px.bar(
+        df_asof,
+        x='Province',
+        y='province_confirmedCount',
+        hover_data=['province_curedCount', 'province_deadCount', 'updateTime'],
+        title=f"截至 {date[:10].replace('-', '/')} 各省份累计确诊病例",
+        labels={'province_confirmedCount': '确诊病例数', 'province_curedCount': '治愈病例数',
+                'province_deadCount': '死亡病例数', 'updateTime': '更新时间', 'Province': '省份'},
+        log_y=True
+    )
+
+    fig.update_layout(margin=dict(l=40, r=40, t=60, b=60))
+
+    return fig
+
+
+def register_health_routes(server):
+    """注册存活检查 /healthz 与就绪检查 /readyz，供容器编排探针使用"""
+
+    @server.route('/healthz')
+    def healthz():
+        return {'status': 'ok'}
+
+    @server.route('/readyz')
+    def readyz():
+        phases = {phase: round(seconds, 4) for phase, seconds in data_store.STARTUP_PHASES.items()}
+        if data_store.is_ready():
+            return {'status': 'ready', 'startup_phases': phases}
+        error = data_store.load_error()
+        if error is not None:
+            return {'status': 'error', 'error': str(error), 'startup_phases': phases}, 503
+        return {'status': 'loading', 'startup_phases': phases}, 503
+
+
+def create_app(preload=None, live=None, asof=None):
+    """
+    创建 Dash 应用。preload 为 True 时在后台线程中预加载数据
+    （默认读取环境变量 COVID_PRELOAD，未设置时开启），否则在首次请求时加载。
+    live 为 True 时开启实时更新模式（默认读取环境变量 COVID_LIVE，未设置时关闭），
+    需要 Dash 2.16 及以上版本。
+    asof 为 True 时显示任意日期查询（默认在时点索引文件存在时开启）。
+    """
+    import asof_index
+    import data_api
+    import live_updates
+
+    if preload is None:
+        preload = os.environ.get('COVID_PRELOAD', '1') != '0'
+    if live is None:
+        live = os.environ.get('COVID_LIVE', '0') == '1'
+    if asof is None:
+        asof = asof_index.index_available()
+    # pandas 在主线程中导入：后台线程导入到一半时，Plotly 序列化会拿到未初始化完成的模块
+    with timed_phase('import_pandas'):
+        import pandas  # noqa: F401
+    if preload:
+        data_store.start_background_load()
+
+    with timed_phase('import_dash'):
+        import dash
+        from dash import Input, Output, State
+        import dash_bootstrap_components as dbc
+
+    with timed_phase('build_app'):
+        # Initialize the Dash app with a modern theme
+        app = dash.Dash(__name__, external_stylesheets=[dbc.themes.FLATLY])
+        app.index_string = INDEX_STRING
+        # 先设置校验用的布局骨架，否则 Dash 会在设置函数式布局时立即调用一次，同步读取数据
+        app.validation_layout = validation_layout(live=live, asof=asof)
+        app.layout = lambda: serve_layout(live=live, asof=asof)
+
+        # 加载中页面：数据就绪后刷新为完整页面
+        app.clientside_callback(
+            """
+            function(n) {
+                fetch('/readyz').then(function (response) {
+                    if (response.ok) {
+                        window.location.reload();
+                    }
+                });
+                return window.dash_clientside.no_update;
+            }
+            """,
+            Output('loading-poll', 'disabled'),
+            Input('loading-poll', 'n_intervals'),
+            prevent_initial_call=True
+        )
+
+        if live:
+            app.callback(
+                Output('covid-chart', 'figure'),
+                Output('live-extended-range', 'data'),
+                [Input('province-dropdown', 'value'),
+                 Input('chart-type', 'value'),
+                 Input('time-slider', 'value')],
+                State('live-extended-range', 'data')
+            )(update_chart_live)
+        else:
+            app.callback(
+                Output('covid-chart', 'figure'),
+                [Input('province-dropdown', 'value'),
+                 Input('chart-type', 'value'),
+                 Input('time-slider', 'value')]
+            )(update_chart)
+
+        app.callback(
+            Output('additional-chart', 'figure'),
+            [Input('province-dropdown', 'value'),
+             Input('time-slider', 'value')]
+        )(update_additional_chart)
+
+        app.callback(
+            Output('data-table', 'children'),
+            [Input('province-dropdown', 'value'),
+             Input('time-slider', 'value')]
+        )(update_table)
+
+        register_health_routes(app.server)
+        data_api.register_api_routes(app.server)
+
+        if asof:
+            app.callback(
+                Output('asof-chart', 'figure'),
+                Input('asof-date', 'date')
+            )(update_asof_chart)
+
+        if live:
+            live_updates.register_live_routes(app.server)
+            live_updates.register_live_callbacks(app, time_slider_marks)
+            live_updates.start_watcher()
+
+    return app
+
+
+def create_server():
+    """WSGI 入口，例如: gunicorn 'dashborad:create_server()'"""
+    return create_app().server
+
+
 if __name__ == '__main__':
+    app = create_app()
+    # 开发模式下等待数据加载完成后输出启动耗时报告
+    get_data()
+    print(data_store.startup_report())
     app.run(debug=True)
@@ -0,0 +1,274 @@
+"""
+只读数据接口
+
+挂在 Dash 应用的 Flask 服务上，按 省份 × 日期 × 指标 返回切片，
+批量使用方不必再抓取页面或回调接口：
+
+    GET /api/v1/provinces
+    GET /api/v1/series?province=湖北,广东&metric=confirmed,dead&start=2020-02-10&end=2022-12-29&format=json
+
+format 可取 json / csv / arrow（Arrow IPC stream，按记录批次流式输出），也可以通过 Accept 请求头协商。
+响应带有根据数据文件修改时间生成的 ETag 与 Last-Modified，支持 If-None-Match /
+If-Modified-Since 条件请求，未变化时直接返回 304，便于 HTTP 缓存承接重复请求。
+"""
+import hashlib
+from datetime import datetime, timezone
+
+import numpy as np
+
+import data_store
+import provinces as province_dim
+
+METRICS = ('confirmed', 'dead')
+
+# 数据只在快照更新时变化，允许缓存短时间复用后再向服务端校验
+CACHE_MAX_AGE = 60
+
+# Arrow 输出每个记录批次的行数
+ARROW_BATCH_ROWS = 64 * 1024
+
+MIME_TYPES = {
+    'json': 'application/json',
+    'csv': 'text/csv; charset=utf-8',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()] if value else []
+
+
+def _normalize_date(value):
+    return value.strip().replace('-', '_').replace('/', '_')
+
+
+def parse_query(args, data):
+    """解析查询参数，返回 (省份编码, 日期列表, 指标列表)"""
+    names = _split(args.get('province'))
+    if names:
+        try:
+            codes = province_dim.to_codes(names)
+        except ValueError as e:
+            raise ApiError(str(e))
+    else:
+        codes = data.codes
+
+    metrics = _split(args.get('metric')) or list(METRICS)
+    unknown = [metric for metric in metrics if metric not in METRICS]
+    if unknown:
+        raise ApiError(f"未知的指标: {unknown}，可选值: {list(METRICS)}")
+
+    start = _normalize_date(args.get('start', data.time_points[0]))
+    end = _normalize_date(args.get('end', data.time_points[-1]))
+    dates = [date for date in data.time_points if start <= date <= end]
+    if not dates:
+        raise ApiError("所选时间范围内没有数据")
+
+    return codes, dates, metrics
+
+
+def select(data, codes, dates, metrics):
+    """
+    按省份编码对齐取出各指标矩阵 {metric: (省份数, 日期数)}，不存在的省份被忽略。
+    矩阵为 float64，缺失值保留为 NaN，由各输出格式转换为 null / 空字段。
+    """
+    rows = province_dim.join_index(codes, data.codes)
+    codes = np.asarray(codes)[rows >= 0]
+    rows = rows[rows >= 0]
+    columns = {'confirmed': data.confirmed_cols, 'dead': data.death_cols}
+    values = {
+        metric: data.df[[columns[metric][date] for date in dates]].to_numpy(dtype=float)[rows]
+        for metric in metrics
+    }
+    return codes, values
+
+
+def _int_values(matrix):
+    """展平为 (int64 数组, 缺失值掩码)"""
+    matrix = matrix.ravel()
+    missing = np.isnan(matrix)
+    return np.where(missing, 0, matrix).astype(np.int64), missing
+
+
+def _json_row(row):
+    ints, missing = _int_values(row)
+    return [None if m else v for v, m in zip(ints.tolist(), missing.tolist())]
+
+
+def to_json(codes, dates, values):
+    return {
+        'dates': [date.replace('_', '-') for date in dates],
+        'series': [
+            dict({'province': province_dim.NAMES[code], 'code': int(code)},
+                 **{metric: _json_row(matrix[i]) for metric, matrix in values.items()})
+            for i, code in enumerate(codes)
+        ],
+    }
+
+
+def to_csv(codes, dates, values):
+    """长表格式：Province, Date, 各指标"""
+    import pandas as pd
+
+    frame = pd.DataFrame({
+        'Province': np.repeat(province_dim.NAMES[codes], len(dates)),
+        'Date': np.tile([date.replace('_', '-') for date in dates], len(codes)),
+    })
+    for metric, matrix in values.items():
+        # 可空整数类型：缺失值输出为空字段
+        frame[metric] = pd.array(matrix.ravel(), dtype='Int64')
+    return frame.to_csv(index=False)
+
+
+class _ChunkSink:
+    """收集 IPC writer 写出的缓冲区，每写完一个批次取走一次"""
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def to_arrow(codes, dates, values, batch_rows=ARROW_BATCH_ROWS):
+    """
+    长表格式的 Arrow IPC stream，返回逐批次产出字节串的生成器。省份列为字典编码
+    （索引直接使用省份编码），数值列为带缺失值掩码的 int64；每个批次序列化后
+    立即发送，不在内存中拼出整个响应体。
+    """
+    import pyarrow as pa
+
+    days = np.array([np.datetime64(date.replace('_', '-')) for date in dates], dtype='datetime64[D]')
+    columns = {
+        'province': pa.DictionaryArray.from_arrays(
+            pa.array(np.repeat(np.asarray(codes, dtype=np.int32), len(dates))),
+            pa.array(province_dim.NAMES.tolist())),
+        'date': pa.array(np.tile(days, len(codes))),
+    }
+    for metric, matrix in values.items():
+        ints, missing = _int_values(matrix)
+        columns[metric] = pa.array(ints, mask=missing)
+    table = pa.table(columns)
+
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=batch_rows):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _choose_format(request):
+    fmt = request.args.get('format')
+    if fmt:
+        if fmt not in MIME_TYPES:
+            raise ApiError(f"未知的格式: {fmt}，可选值: {list(MIME_TYPES)}")
+        return fmt
+    best = request.accept_mimetypes.best_match(
+        [MIME_TYPES['json'], 'text/csv', MIME_TYPES['arrow']], default=MIME_TYPES['json'])
+    return {'text/csv': 'csv', MIME_TYPES['arrow']: 'arrow'}.get(best, 'json')
+
+
+def _validators(data, request, fmt):
+    """ETag 由数据文件修改时间与规范化后的查询参数决定，各 worker 进程间一致"""
+    query = '&'.join(f"{key}={value}" for key, value in sorted(request.args.items(multi=True)))
+    digest = hashlib.sha1(f"{data.mtime}|{request.path}|{query}|{fmt}".encode('utf-8')).hexdigest()[:16]
+    last_modified = datetime.fromtimestamp(data.mtime / 1e9, tz=timezone.utc).replace(microsecond=0)
+    return digest, last_modified
+
+
+def _respond(request, data, fmt, build_body):
+    from flask import Response
+
+    etag, last_modified = _validators(data, request, fmt)
+    response = Response(content_type=MIME_TYPES[fmt])
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    response.vary.add('Accept')
+
+    # 条件请求命中时不再生成响应体
+    if request.if_none_match:
+        # If-None-Match 按 RFC 7232 使用弱比较（经 gzip 等代理后 ETag 会变为 W/"..."）
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        not_modified = request.if_modified_since is not None and last_modified <= request.if_modified_since
+    if not_modified:
+        response.status_code = 304
+        return response
+
+    body = build_body()
+    if isinstance(body, (str, bytes)):
+        response.set_data(body)
+    else:
+        # 生成器逐块输出，不设置 Content-Length
+        response.response = body
+    return response
+
+
+def register_api_routes(server):
+    import json
+
+    from flask import request
+
+    def error_response(error):
+        from flask import Response
+
+        body = json.dumps({'error': str(error)}, ensure_ascii=False)
+        return Response(body, status=error.status, mimetype=MIME_TYPES['json'])
+
+    @server.route('/api/v1/provinces')
+    def api_provinces():
+        data = data_store.get_data()
+        present = set(data.codes.tolist())
+        body = [
+            {'code': p.code, 'name': p.name, 'full_name': p.full_name, 'english_name': p.english_name,
+             'region': p.region, 'adcode': p.adcode, 'population': p.population}
+            for p in province_dim.PROVINCES if p.code in present
+        ]
+        return _respond(request, data, 'json', lambda: json.dumps(body, ensure_ascii=False))
+
+    @server.route('/api/v1/series')
+    def api_series():
+        data = data_store.get_data()
+        try:
+            fmt = _choose_format(request)
+            codes, dates, metrics = parse_query(request.args, data)
+        except ApiError as e:
+            return error_response(e)
+
+        if fmt == 'arrow':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return error_response(ApiError("服务端未安装 pyarrow，无法输出 Arrow 格式", status=406))
+
+        def build_body():
+            selected_codes, values = select(data, codes, dates, metrics)
+            if fmt == 'csv':
+                return to_csv(selected_codes, dates, values)
+            if fmt == 'arrow':
+                return to_arrow(selected_codes, dates, values)
+            return json.dumps(to_json(selected_codes, dates, values), ensure_ascii=False)
+
+        return _respond(request, data, fmt, build_body)
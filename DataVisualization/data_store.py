@@ -0,0 +1,170 @@
+"""
+疫情数据加载模块
+
+pandas 等重依赖在首次使用时才导入，数据在首次访问或后台线程中读取，
+以缩短进程启动时间；各阶段耗时记录在 STARTUP_PHASES 中。
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import provinces as province_dim
+
+# 数据文件路径，可通过环境变量 COVID_DATA_PATH 覆盖
+DATA_PATH = os.environ.get('COVID_DATA_PATH', r"D:\数据可视化\数据\merged_province_data.csv")
+
+# 启动各阶段耗时（秒），按记录顺序保存
+STARTUP_PHASES = {}
+
+# codes: 每行省份的统一编码；version: 进程内数据版本号；mtime: 数据文件修改时间（纳秒）
+CovidData = namedtuple('CovidData', ['df', 'time_points', 'confirmed_cols', 'death_cols', 'provinces',
+                                     'codes', 'version', 'mtime'])
+
+_data = None
+_load_error = None
+_lock = threading.Lock()
+_loader_thread = None
+
+
+@contextmanager
+def timed_phase(name):
+    """记录一个启动阶段的耗时"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_PHASES[name] = STARTUP_PHASES.get(name, 0.0) + time.perf_counter() - start
+
+
+def _time_points(columns):
+    """从 `YYYY_MM_DD_Confirmed` 形式的列名中提取排好序的日期"""
+    return sorted(set('_'.join(col.split('_')[:3]) for col in columns if col != 'Province'))
+
+
+def _build(df, version, mtime, codes=None):
+    """整理日期列；codes 为空时把省份名称转换为统一编码并规范为简称"""
+    if codes is None:
+        codes = province_dim.to_codes(df['Province'])
+        df['Province'] = province_dim.NAMES[codes]
+
+    time_points = _time_points(df.columns)
+
+    # Create dictionaries to map original columns to readable names
+    confirmed_cols = {date: f"{date}_Confirmed" for date in time_points}
+    death_cols = {date: f"{date}_Dead" for date in time_points}
+
+    provinces = sorted(df['Province'].unique())
+
+    return CovidData(df, time_points, confirmed_cols, death_cols, provinces, codes, version, mtime)
+
+
+def load_data(path=DATA_PATH, version=1):
+    """读取合并后的省份数据并整理出日期列"""
+    with timed_phase('import_pandas'):
+        import pandas as pd
+
+    with timed_phase('read_csv'):
+        mtime = os.stat(path).st_mtime_ns
+        df = pd.read_csv(path)
+
+    with timed_phase('preprocess'):
+        data = _build(df, version, mtime)
+
+    return data
+
+
+def get_data():
+    """返回已加载的数据；尚未加载时在当前线程加载（后台加载进行中则等待其完成）"""
+    global _data, _load_error
+    if _data is None:
+        with _lock:
+            if _data is None:
+                try:
+                    _data = load_data()
+                    _load_error = None
+                except Exception as e:
+                    _load_error = e
+                    raise
+    return _data
+
+
+def refresh_data(path=DATA_PATH):
+    """
+    检查数据文件是否有更新。
+
+    只在末尾追加了新日期列时，仅读取新增的列并合并到现有数据中，返回新增日期列表；
+    其它变化（修改历史数据、新增省份等）整体重新加载并返回 None；
+    文件未变化（包括重新保存但内容相同）时返回 []。
+    """
+    global _data
+    import pandas as pd
+
+    current = get_data()
+    with _lock:
+        mtime = os.stat(path).st_mtime_ns
+        if mtime == current.mtime:
+            return []
+
+        header = pd.read_csv(path, nrows=0).columns
+        new_columns = [col for col in header if col not in set(current.df.columns)]
+        new_dates = _time_points(new_columns)
+        appended = (set(current.df.columns) <= set(header) and new_dates
+                    and (not current.time_points or new_dates[0] > current.time_points[-1]))
+
+        if appended:
+            delta = pd.read_csv(path, usecols=['Province'] + new_columns)
+            delta_codes = province_dim.to_codes(delta['Province'])
+            appended = set(delta_codes) == set(current.codes)
+
+        if not appended:
+            data = _build(pd.read_csv(path), current.version + 1, mtime)
+            if data.df.equals(current.df):
+                # 文件被重新保存但内容未变：只记录新的修改时间，不通知客户端刷新
+                _data = current._replace(mtime=mtime)
+                return []
+            _data = data
+            return None
+
+        # 按省份编码把新增列对齐到现有行
+        rows = province_dim.join_index(current.codes, delta_codes)
+        df = current.df.copy()
+        for col in new_columns:
+            df[col] = delta[col].to_numpy()[rows]
+        _data = _build(df, current.version + 1, mtime, current.codes)
+        return new_dates
+
+
+def _background_load():
+    try:
+        get_data()
+    except Exception:
+        # 错误已记录在 _load_error 中，由就绪检查接口报告
+        pass
+
+
+def start_background_load():
+    """在后台线程中预加载数据，重复调用不会重复启动"""
+    global _loader_thread
+    if _data is None and (_loader_thread is None or not _loader_thread.is_alive()):
+        _loader_thread = threading.Thread(target=_background_load, name='covid-data-loader', daemon=True)
+        _loader_thread.start()
+    return _loader_thread
+
+
+def is_ready():
+    return _data is not None
+
+
+def load_error():
+    return _load_error
+
+
+def startup_report():
+    """按阶段输出启动耗时报告"""
+    lines = ["启动耗时报告:"]
+    for phase, seconds in STARTUP_PHASES.items():
+        lines.append(f"  {phase:<20s} {seconds * 1000:9.1f} ms")
+    lines.append(f"  {'total':<20s} {sum(STARTUP_PHASES.values()) * 1000:9.1f} ms")
+    return '\n'.join(lines)
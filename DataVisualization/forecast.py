@@ -0,0 +1,124 @@
+"""
+短期预测
+
+对所有省份同时拟合对数线性增长模型 log(1 + y) = a + b * t（t 为距首个快照的天数），
+最小二乘解、残差与预测区间都以 (省份, 日期) 矩阵运算一次算出，不逐省循环。
+快照日期间隔不均匀，因此按实际天数而不是按序号建模。
+拟合结果按数据版本缓存，数据更新（版本号变化）后下次请求自动重新计算。
+"""
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+# 参与拟合的最近快照个数
+WINDOW = 3
+
+# 估计预测区间所需的最少快照数：两点拟合的残差自由度为 0，无法估计误差
+MIN_SNAPSHOTS = 3
+
+# 预测距最后一个快照的天数
+HORIZONS = (30, 60, 90)
+
+# 95% 预测区间使用自由度为 n - 2 的 Student-t 分位数 t(0.975, dof)；
+# 窗口很小（默认 3 个快照，自由度为 1）时与正态分位数 1.96 相差很大，不能互相替代
+T_975 = (
+    12.706205, 4.302653, 3.182446, 2.776445, 2.570582, 2.446912, 2.364624, 2.306004, 2.262157, 2.228139,
+    2.200985, 2.178813, 2.160369, 2.144787, 2.131450, 2.119905, 2.109816, 2.100922, 2.093024, 2.085963,
+    2.079614, 2.073873, 2.068658, 2.063899, 2.059539, 2.055529, 2.051831, 2.048407, 2.045230, 2.042272,
+)
+
+# 自由度超出 T_975 时使用的正态分位数
+Z_95 = 1.959964
+
+
+def t_quantile_975(dof):
+    return T_975[dof - 1] if dof <= len(T_975) else Z_95
+
+Forecast = namedtuple('Forecast', ['codes', 'dates', 'mean', 'lower', 'upper', 'daily_growth'])
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def day_offsets(time_points):
+    """'YYYY_MM_DD' 日期列表 -> 距第一个日期的天数数组"""
+    days = np.array([np.datetime64(date.replace('_', '-')) for date in time_points], dtype='datetime64[D]')
+    return (days - days[0]).astype(float)
+
+
+def fit_log_linear(t, Y, horizons, z=None):
+    """
+    对 Y 的每一行（一个省份）拟合 log1p(y) = a + b * t，返回未来各 horizons 天的
+    (mean, lower, upper, daily_growth)，前三者形状为 (省份数, len(horizons))。
+    z 为区间的分位数，默认取自由度 n - 2 的 t 分位数（95% 区间）。
+    快照少于 MIN_SNAPSHOTS 个时无法估计预测区间，lower 与 upper 为 None。
+    """
+    t = np.asarray(t, dtype=float)
+    logY = np.log1p(np.asarray(Y, dtype=float))
+    n = len(t)
+
+    t_mean = t.mean()
+    dt = t - t_mean
+    sxx = (dt ** 2).sum()
+    y_mean = logY.mean(axis=1, keepdims=True)
+
+    slope = ((logY - y_mean) @ dt) / sxx if sxx > 0 else np.zeros(len(logY))
+    intercept = y_mean[:, 0] - slope * t_mean
+
+    future = t[-1] + np.asarray(horizons, dtype=float)
+    fitted = intercept[:, None] + slope[:, None] * future[None, :]
+
+    # 累计病例数不会下降：预测值不低于最后一次观测值，且随时间单调不减
+    last = np.asarray(Y, dtype=float)[:, -1:]
+    mean = np.maximum.accumulate(np.maximum(np.expm1(fitted), last), axis=1)
+    if n < MIN_SNAPSHOTS:
+        return mean, None, None, np.expm1(slope)
+
+    residuals = logY - (intercept[:, None] + slope[:, None] * t[None, :])
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / (n - 2))
+    leverage = 1 + 1 / n + ((future - t_mean) ** 2 / sxx if sxx > 0 else 0)
+    if z is None:
+        z = t_quantile_975(n - 2)
+    half_width = z * sigma[:, None] * np.sqrt(leverage)[None, :]
+
+    lower = np.maximum.accumulate(np.maximum(np.expm1(fitted - half_width), last), axis=1)
+    upper = np.maximum.accumulate(np.maximum(np.expm1(fitted + half_width), last), axis=1)
+
+    daily_growth = np.expm1(slope)
+    return mean, lower, upper, daily_growth
+
+
+def province_forecast(data, metric='confirmed', end=None, window=WINDOW, horizons=HORIZONS):
+    """
+    用截至第 end 个快照（默认最后一个）的最近 window 个快照为所有省份做预测，
+    结果按 (数据版本, 参数) 缓存。
+    """
+    if end is None:
+        end = len(data.time_points) - 1
+    key = (data.version, metric, end, window, tuple(horizons))
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    columns = data.confirmed_cols if metric == 'confirmed' else data.death_cols
+    start = max(0, end - window + 1)
+    selected = data.time_points[start:end + 1]
+    if len(selected) < 2:
+        raise ValueError("预测至少需要两个快照")
+
+    Y = data.df[[columns[date] for date in selected]].to_numpy(dtype=float)
+    t = day_offsets(selected)
+    mean, lower, upper, daily_growth = fit_log_linear(t, Y, horizons)
+
+    last_day = np.datetime64(selected[-1].replace('_', '-'))
+    dates = [str(last_day + np.timedelta64(h, 'D')) for h in horizons]
+    result = Forecast(data.codes, dates, mean, lower, upper, daily_growth)
+
+    with _cache_lock:
+        # 只保留当前数据版本的结果
+        for stale in [k for k in _cache if k[0] != data.version]:
+            del _cache[stale]
+        _cache[key] = result
+    return result
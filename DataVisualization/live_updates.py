@@ -0,0 +1,207 @@
+"""
+实时更新模式
+
+后台线程轮询数据文件，发现追加的新日期时只读取新增列（见 data_store.refresh_data），
+并通过 SSE (/live/stream) 推送给所有已连接的页面；页面端用 extendData 把新数据点
+追加到当前折线图/柱状图上，而不是重新渲染整张图。时间滑块的范围同时扩展，
+原先选到最新日期的，终点随之后移，其余面板按新范围更新。
+
+SSE 是长连接，部署时需使用多线程或协程 worker（例如 gunicorn --threads / gevent）。
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+import data_store
+
+# 轮询数据文件的间隔（秒）
+POLL_INTERVAL = float(os.environ.get('COVID_LIVE_INTERVAL', '2'))
+
+# 无数据时发送心跳的间隔（秒），防止代理断开空闲连接
+KEEPALIVE_INTERVAL = 15
+
+_subscribers = set()
+_subscribers_lock = threading.Lock()
+_watcher_thread = None
+
+# 可以用 extendData 追加数据点的主图类型，需与 EXTEND_CHART_JS 一致
+EXTENDABLE_CHART_TYPES = ('line-confirmed', 'line-dead', 'bar-confirmed', 'bar-dead')
+
+# 客户端回调：把推送的新日期数据按省份追加到主图对应的曲线上
+EXTEND_CHART_JS = """
+function(update, chartType, figure) {
+    const noUpdate = window.dash_clientside.no_update;
+    if (!update || !figure || !figure.data) {
+        return noUpdate;
+    }
+    let series = null;
+    if (chartType === 'line-confirmed' || chartType === 'bar-confirmed') {
+        series = update.confirmed;
+    } else if (chartType === 'line-dead' || chartType === 'bar-dead') {
+        series = update.dead;
+    }
+    if (!series) {
+        return noUpdate;
+    }
+    const xs = [], ys = [], indices = [];
+    figure.data.forEach(function (trace, i) {
+        // 只扩展显示到上一次最新日期的曲线，时间范围被截断的图保持不变
+        const x = trace.x || [];
+        if (series[trace.name] && x[x.length - 1] === update.after) {
+            xs.push(update.dates);
+            ys.push(series[trace.name]);
+            indices.push(i);
+        }
+    });
+    if (!indices.length) {
+        return noUpdate;
+    }
+    return [{x: xs, y: ys}, indices];
+}
+"""
+
+
+def subscribe():
+    q = queue.Queue()
+    with _subscribers_lock:
+        _subscribers.add(q)
+    return q
+
+
+def unsubscribe(q):
+    with _subscribers_lock:
+        _subscribers.discard(q)
+
+
+def publish(event, payload):
+    """向所有已连接的客户端广播一条事件"""
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for q in subscribers:
+        q.put((event, payload))
+
+
+def _rows(df, columns):
+    """各行的取值列表；缺失值转换为 None（浏览器端 JSON.parse 不接受 NaN）"""
+    values = df[columns].astype(object)
+    return values.where(values.notna(), None).values.tolist()
+
+
+def build_update(data, new_dates):
+    """把新增日期的数据整理成客户端 extendData 使用的格式"""
+    previous = [date for date in data.time_points if date < new_dates[0]]
+    df = data.df.set_index('Province')
+    return {
+        'version': data.version,
+        'after': previous[-1].replace('_', '/') if previous else None,
+        'dates': [date.replace('_', '/') for date in new_dates],
+        'confirmed': dict(zip(df.index, _rows(df, [data.confirmed_cols[d] for d in new_dates]))),
+        'dead': dict(zip(df.index, _rows(df, [data.death_cols[d] for d in new_dates]))),
+    }
+
+
+def check_for_updates():
+    """检查一次数据文件，有变化时推送给客户端"""
+    new_dates = data_store.refresh_data()
+    if new_dates is None:
+        # 非追加式修改，通知客户端整页刷新
+        publish('reload', {'version': data_store.get_data().version})
+    elif new_dates:
+        publish('snapshot', build_update(data_store.get_data(), new_dates))
+    return new_dates
+
+
+def _watch(interval):
+    last_error = None
+    while True:
+        time.sleep(interval)
+        try:
+            check_for_updates()
+            last_error = None
+        except Exception as e:
+            # 文件可能正在写入，下一轮再试；同一错误持续出现时只输出一次
+            error = f"{type(e).__name__}: {e}"
+            if error != last_error:
+                print("实时更新检查失败:", error)
+                last_error = error
+
+
+def start_watcher(interval=POLL_INTERVAL):
+    """启动后台轮询线程，重复调用不会重复启动"""
+    global _watcher_thread
+    if _watcher_thread is None or not _watcher_thread.is_alive():
+        _watcher_thread = threading.Thread(target=_watch, args=(interval,), name='covid-live-watcher', daemon=True)
+        _watcher_thread.start()
+    return _watcher_thread
+
+
+def layout_components():
+    """实时模式下追加到页面布局中的组件"""
+    from dash import dcc, html
+
+    return [
+        dcc.Store(id='live-update-store'),
+        # 时间滑块因推送而后移时记录新的范围，主图据此跳过一次整体重绘
+        dcc.Store(id='live-extended-range'),
+        # 供 assets/live_updates.js 判断是否需要建立 SSE 连接
+        html.Div(id='live-mode-flag', style={'display': 'none'}),
+    ]
+
+
+def register_live_routes(server):
+    from flask import Response
+
+    @server.route('/live/stream')
+    def live_stream():
+        q = subscribe()
+
+        def events():
+            try:
+                yield 'retry: 3000\n\n'
+                while True:
+                    try:
+                        event, payload = q.get(timeout=KEEPALIVE_INTERVAL)
+                    except queue.Empty:
+                        yield ': keep-alive\n\n'
+                        continue
+                    data = json.dumps(payload, ensure_ascii=False, allow_nan=False)
+                    yield f"event: {event}\ndata: {data}\n\n"
+            finally:
+                unsubscribe(q)
+
+        return Response(events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def register_live_callbacks(app, slider_marks):
+    """slider_marks(time_points) 生成时间滑块的刻度"""
+    from dash import Input, Output, State, no_update
+
+    @app.callback(
+        Output('time-slider', 'max'),
+        Output('time-slider', 'marks'),
+        Output('time-slider', 'value'),
+        Output('live-extended-range', 'data', allow_duplicate=True),
+        Input('live-update-store', 'data'),
+        State('time-slider', 'value'),
+        State('time-slider', 'max'),
+        prevent_initial_call=True
+    )
+    def extend_time_slider(update, value, slider_max):
+        time_points = data_store.get_data().time_points
+        new_max = len(time_points) - 1
+        if value and value[1] == slider_max:
+            value = [value[0], new_max]
+            return new_max, slider_marks(time_points), value, value
+        return new_max, slider_marks(time_points), no_update, no_update
+
+    app.clientside_callback(
+        EXTEND_CHART_JS,
+        Output('covid-chart', 'extendData'),
+        Input('live-update-store', 'data'),
+        State('chart-type', 'value'),
+        State('covid-chart', 'figure'),
+        prevent_initial_call=True
+    )
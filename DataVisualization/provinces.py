@@ -0,0 +1,127 @@
+"""
+省级行政区维度表
+
+为 34 个省级行政区分配稳定的整数编码 (code)，并记录简称、全称、英文名、
+所属地区、行政区划代码 (adcode) 与常住人口。各数据加载入口在读取时调用
+to_codes() 把省份名称一次性转换为编码，之后地图 ↔ 数据、快照 ↔ 快照之间的
+关联都通过 join_index() 在整数数组上完成，不再反复做字符串匹配。
+"""
+from collections import namedtuple
+
+# NumPy / pandas 在首次使用编码数组或 to_codes() 时才导入，导入本模块本身很轻
+
+Province = namedtuple('Province', ['code', 'name', 'full_name', 'english_name', 'region', 'adcode', 'population'])
+
+# 编码一经使用不可修改，新增条目只能追加在末尾
+# population: 常住人口（万人，第七次全国人口普查；港澳台为 2020 年官方统计）
+PROVINCES = [
+    Province(0, '北京', '北京市', 'Beijing', '华北', 110000, 2189),
+    Province(1, '天津', '天津市', 'Tianjin', '华北', 120000, 1387),
+    Province(2, '河北', '河北省', 'Hebei', '华北', 130000, 7461),
+    Province(3, '山西', '山西省', 'Shanxi', '华北', 140000, 3492),
+    Province(4, '内蒙古', '内蒙古自治区', 'Inner Mongolia', '华北', 150000, 2405),
+    Province(5, '辽宁', '辽宁省', 'Liaoning', '东北', 210000, 4259),
+    Province(6, '吉林', '吉林省', 'Jilin', '东北', 220000, 2407),
+    Province(7, '黑龙江', '黑龙江省', 'Heilongjiang', '东北', 230000, 3185),
+    Province(8, '上海', '上海市', 'Shanghai', '华东', 310000, 2487),
+    Province(9, '江苏', '江苏省', 'Jiangsu', '华东', 320000, 8475),
+    Province(10, '浙江', '浙江省', 'Zhejiang', '华东', 330000, 6457),
+    Province(11, '安徽', '安徽省', 'Anhui', '华东', 340000, 6103),
+    Province(12, '福建', '福建省', 'Fujian', '华东', 350000, 4154),
+    Province(13, '江西', '江西省', 'Jiangxi', '华东', 360000, 4519),
+    Province(14, '山东', '山东省', 'Shandong', '华东', 370000, 10153),
+    Province(15, '河南', '河南省', 'Henan', '华中', 410000, 9937),
+    Province(16, '湖北', '湖北省', 'Hubei', '华中', 420000, 5775),
+    Province(17, '湖南', '湖南省', 'Hunan', '华中', 430000, 6644),
+    Province(18, '广东', '广东省', 'Guangdong', '华南', 440000, 12601),
+    Province(19, '广西', '广西壮族自治区', 'Guangxi', '华南', 450000, 5013),
+    Province(20, '海南', '海南省', 'Hainan', '华南', 460000, 1008),
+    Province(21, '重庆', '重庆市', 'Chongqing', '西南', 500000, 3205),
+    Province(22, '四川', '四川省', 'Sichuan', '西南', 510000, 8367),
+    Province(23, '贵州', '贵州省', 'Guizhou', '西南', 520000, 3856),
+    Province(24, '云南', '云南省', 'Yunnan', '西南', 530000, 4721),
+    Province(25, '西藏', '西藏自治区', 'Tibet', '西南', 540000, 365),
+    Province(26, '陕西', '陕西省', 'Shaanxi', '西北', 610000, 3953),
+    Province(27, '甘肃', '甘肃省', 'Gansu', '西北', 620000, 2502),
+    Province(28, '青海', '青海省', 'Qinghai', '西北', 630000, 592),
+    Province(29, '宁夏', '宁夏回族自治区', 'Ningxia', '西北', 640000, 720),
+    Province(30, '新疆', '新疆维吾尔自治区', 'Xinjiang', '西北', 650000, 2585),
+    Province(31, '台湾', '台湾省', 'Taiwan', '港澳台', 710000, 2356),
+    Province(32, '香港', '香港特别行政区', 'Hong Kong', '港澳台', 810000, 747),
+    Province(33, '澳门', '澳门特别行政区', 'Macau', '港澳台', 820000, 68),
+]
+
+N_PROVINCES = len(PROVINCES)
+
+# 按编码排列的属性数组，可直接用编码数组取值，例如 NAMES[codes]；
+# 首次访问时由模块级 __getattr__ 创建，{数组名: (字段, dtype)}
+_ARRAY_FIELDS = {
+    'NAMES': ('name', object),
+    'FULL_NAMES': ('full_name', object),
+    'REGIONS': ('region', object),
+    'ADCODES': ('adcode', None),
+    'POPULATION': ('population', float),
+}
+
+# 其它数据源中出现过的写法
+EXTRA_ALIASES = {
+    'Xizang': '西藏', 'Macao': '澳门', 'Hongkong': '香港', 'Inner Mongolia Autonomous Region': '内蒙古',
+}
+
+ALIASES = {}
+for _p in PROVINCES:
+    for _alias in (_p.name, _p.full_name, _p.english_name, str(_p.adcode)):
+        ALIASES[_alias] = _p.code
+for _alias, _name in EXTRA_ALIASES.items():
+    ALIASES[_alias] = ALIASES[_name]
+
+_alias_index = None
+_alias_codes = None
+
+
+def __getattr__(name):
+    if name not in _ARRAY_FIELDS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import numpy as np
+
+    field, dtype = _ARRAY_FIELDS[name]
+    values = np.array([getattr(p, field) for p in PROVINCES], dtype=dtype)
+    globals()[name] = values
+    return values
+
+
+def to_codes(names, strict=True):
+    """
+    把省份名称（简称、全称、英文名或 adcode）转换为编码数组。
+    strict 为 True 时遇到无法识别的名称抛出 ValueError，否则对应位置为 -1。
+    """
+    global _alias_index, _alias_codes
+    import numpy as np
+    import pandas as pd
+
+    if _alias_index is None:
+        _alias_codes = np.array(list(ALIASES.values()))
+        _alias_index = pd.Index(list(ALIASES))
+
+    names = pd.Index(names).astype(str).str.strip()
+    positions = _alias_index.get_indexer(names)
+    codes = np.where(positions >= 0, _alias_codes[positions], -1)
+    if strict and (codes < 0).any():
+        unknown = sorted(set(names[codes < 0]))
+        raise ValueError(f"无法识别的省份名称: {unknown}")
+    return codes
+
+
+def join_index(left_codes, right_codes):
+    """
+    整数数组关联：返回 left 中每一行在 right 中的行号，right 中不存在的为 -1。
+    right_codes 中的编码必须唯一。
+    """
+    import numpy as np
+
+    right_codes = np.asarray(right_codes)
+    if (right_codes < 0).any() or len(np.unique(right_codes)) != len(right_codes):
+        raise ValueError("关联右侧的省份编码必须有效且唯一")
+    position = np.full(N_PROVINCES + 1, -1)  # 末位对应编码 -1
+    position[right_codes] = np.arange(len(right_codes))
+    return position[np.asarray(left_codes)]
@@ -0,0 +1,341 @@
+"""
+静态报告生成
+
+把报告中的所有图表（确诊/死亡趋势、热力图、死亡率趋势、各日期风险聚类地图）
+声明为任务，在进程池中用无界面的 Agg 后端并行绘制，最后汇总为一个 HTML 报告
+（可选同时输出 PDF）。每个任务的输入文件内容、参数与绘图代码计算出内容哈希，
+与上次相同且图片仍存在时跳过，只重新绘制有变化的图表。
+
+用法:
+    python report.py [--output DIR] [--data-dir DIR] [--data PATH] [--map PATH] [--workers N] [--pdf] [--force]
+"""
+import argparse
+import glob
+import hashlib
+import html
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import covid_cluster
+import data_store
+
+# 快照数据目录与报告输出目录，可通过环境变量覆盖
+DATA_DIR = os.environ.get('COVID_DATA_DIR', r"D:\数据可视化\数据")
+OUTPUT_DIR = os.environ.get('COVID_REPORT_DIR', r"D:\数据可视化\报告文件\report")
+
+MANIFEST_FILE = 'manifest.json'
+DPI = 150
+
+# 按优先顺序尝试的中文字体（Windows / Linux / macOS 常见字体）
+CJK_FONTS = ['SimHei', 'Microsoft YaHei', 'Noto Sans CJK SC', 'Noto Sans SC', 'Source Han Sans SC',
+             'WenQuanYi Zen Hei', 'WenQuanYi Micro Hei', 'PingFang SC', 'Heiti SC', 'Arial Unicode MS']
+
+# 绘图代码所在的模块，内容变化时所有图表重新绘制
+RENDER_SOURCES = ['report.py', 'covid_cluster.py', 'yellow_bricks.py', 'data_store.py', 'provinces.py']
+
+# name: 图片文件名（不含扩展名）；render: 模块级绘图函数 render(output_path, **params)；
+# inputs: 参与内容哈希的输入文件
+Task = namedtuple('Task', ['name', 'title', 'render', 'inputs', 'params'])
+
+
+def cjk_font():
+    """CJK_FONTS 中第一个已安装的字体名称，都没有时返回 None"""
+    from matplotlib import font_manager
+
+    installed = {font.name for font in font_manager.fontManager.ttflist}
+    return next((name for name in CJK_FONTS if name in installed), None)
+
+
+def _pyplot():
+    """在当前进程中选择无界面后端与中文字体并返回 pyplot"""
+    import warnings
+
+    import matplotlib
+
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    font = cjk_font()
+    if font is None:
+        warnings.warn(f"未找到中文字体（{', '.join(CJK_FONTS)}），图表中的中文将显示为方框")
+    else:
+        plt.rcParams['font.sans-serif'] = [font] + plt.rcParams['font.sans-serif']
+    plt.rcParams['axes.unicode_minus'] = False
+    return plt
+
+
+def _series(data, metric):
+    """(省份名称, 日期, 省份 × 日期矩阵)"""
+    import numpy as np
+
+    columns = data.confirmed_cols if metric == 'confirmed' else data.death_cols
+    dates = np.array([np.datetime64(date.replace('_', '-')) for date in data.time_points])
+    values = data.df[[columns[date] for date in data.time_points]].to_numpy(dtype=float)
+    return data.df['Province'].to_numpy(), dates, values
+
+
+def render_trend(output, data_path, metric, top_n=10):
+    plt = _pyplot()
+    names, dates, values = _series(data_store.load_data(data_path), metric)
+    label = '确诊病例数' if metric == 'confirmed' else '死亡病例数'
+
+    fig, ax = plt.subplots(figsize=(14, 8))
+    for i in values[:, -1].argsort()[::-1][:top_n]:
+        ax.plot(dates, values[i], marker='o', linewidth=2, label=names[i])
+    ax.set_title(f'{label}最多的 {top_n} 个省份 {label}趋势', fontsize=16)
+    ax.set_xlabel('日期', fontsize=14)
+    ax.set_ylabel(label, fontsize=14)
+    ax.set_yscale('log')
+    ax.grid(True, which="both", ls="--")
+    ax.legend(bbox_to_anchor=(1.02, 1), loc='upper left')
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    fig.savefig(output, dpi=DPI, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_heatmap(output, data_path):
+    import numpy as np
+
+    plt = _pyplot()
+    data = data_store.load_data(data_path)
+    names, _, values = _series(data, 'confirmed')
+    order = values[:, -1].argsort()[::-1]
+
+    fig, ax = plt.subplots(figsize=(12, 12))
+    image = ax.imshow(np.log1p(values[order]), aspect='auto', cmap='viridis')
+    ax.set_yticks(range(len(names)))
+    ax.set_yticklabels(names[order])
+    ax.set_xticks(range(len(data.time_points)))
+    ax.set_xticklabels([date.replace('_', '/') for date in data.time_points], rotation=45, ha='right')
+    ax.set_title('中国各省份新冠确诊病例热力图 (对数比例)', fontsize=16)
+    fig.colorbar(image, ax=ax, label='确诊病例数(对数)')
+    fig.tight_layout()
+    fig.savefig(output, dpi=DPI, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_mortality(output, data_path, top_n=10):
+    import numpy as np
+    import pandas as pd
+
+    import yellow_bricks
+
+    plt = _pyplot()
+    data = data_store.load_data(data_path)
+    names, dates, confirmed = _series(data, 'confirmed')
+    _, _, dead = _series(data, 'dead')
+
+    # 与 yellow_bricks.py 使用的长表格式一致，死亡率由确诊与死亡数直接计算（单位 %）
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(confirmed > 0, dead / confirmed * 100, np.nan)
+    mortality_df = pd.DataFrame({
+        'Date': np.tile(dates, len(names)),
+        'Province': np.repeat(names, len(dates)),
+        'Mortality Rate': rate.ravel(),
+    }).dropna()
+    # 对数坐标下无法显示 0
+    mortality_df = mortality_df[mortality_df['Mortality Rate'] > 0]
+
+    fig = yellow_bricks.plot_mortality_trend(mortality_df, top_n)
+    fig.savefig(output, dpi=DPI, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_cluster_map(output, map_path, cluster_path, date):
+    plt = _pyplot()
+    fig, ax, _ = covid_cluster.plot_cluster_map(covid_cluster.load_merged(map_path, cluster_path))
+    ax.set_title(f"中国各省市COVID-19疫情风险聚类 ({date[:4]}/{date[4:6]}/{date[6:]})", fontsize=18, pad=20)
+    fig.savefig(output, dpi=DPI, bbox_inches='tight')
+    plt.close(fig)
+
+
+def declare_tasks(data_dir=DATA_DIR, data_path=data_store.DATA_PATH, map_path=covid_cluster.shp_path):
+    """报告包含的全部图表"""
+    tasks = [
+        Task('trend_confirmed', '确诊病例趋势', render_trend, [data_path],
+             {'data_path': data_path, 'metric': 'confirmed'}),
+        Task('trend_dead', '死亡病例趋势', render_trend, [data_path],
+             {'data_path': data_path, 'metric': 'dead'}),
+        Task('heatmap_confirmed', '确诊病例热力图', render_heatmap, [data_path],
+             {'data_path': data_path}),
+        Task('mortality_trend', '死亡率变化趋势', render_mortality, [data_path],
+             {'data_path': data_path}),
+    ]
+
+    # shapefile 由多个同名文件组成，均参与哈希
+    map_files = sorted(glob.glob(os.path.splitext(map_path)[0] + '.*'))
+    for cluster_path in sorted(glob.glob(os.path.join(data_dir, '[0-9]' * 8 + '_clustered.csv'))):
+        date = os.path.basename(cluster_path)[:8]
+        tasks.append(Task(f'cluster_map_{date}', f'风险聚类地图 {date[:4]}/{date[4:6]}/{date[6:]}',
+                          render_cluster_map, map_files + [cluster_path],
+                          {'map_path': map_path, 'cluster_path': cluster_path, 'date': date}))
+    return tasks
+
+
+def _file_digest(path, digests):
+    if path not in digests:
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        digests[path] = h.hexdigest()
+    return digests[path]
+
+
+def task_hash(task, code_hash, digests):
+    """任务的内容哈希：绘图代码 + 函数 + 参数 + 输入文件内容"""
+    h = hashlib.sha1()
+    h.update(code_hash.encode())
+    h.update(task.render.__name__.encode())
+    h.update(json.dumps(task.params, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    h.update(str(DPI).encode())
+    for path in task.inputs:
+        h.update(_file_digest(path, digests).encode() if os.path.exists(path) else b'missing')
+    return h.hexdigest()
+
+
+def _code_hash():
+    here = os.path.dirname(os.path.abspath(__file__))
+    digests = {}
+    return hashlib.sha1(''.join(_file_digest(os.path.join(here, name), digests)
+                                for name in RENDER_SOURCES).encode()).hexdigest()
+
+
+def _run_task(render, output, params):
+    """进程池中执行单个绘图任务，返回 (耗时, 错误信息)"""
+    start = time.perf_counter()
+    try:
+        render(output, **params)
+        return time.perf_counter() - start, None
+    except Exception as e:
+        return time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+
+def write_html(path, tasks, results, data_path):
+    data = data_store.load_data(data_path)
+    sections = []
+    for task in tasks:
+        error = results[task.name]['error']
+        if error:
+            body = f'<p class="error">图表生成失败：{html.escape(error)}</p>'
+        else:
+            body = f'<img src="figures/{task.name}.png" alt="{html.escape(task.title)}">'
+        sections.append(f'<section><h2>{html.escape(task.title)}</h2>{body}</section>')
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>中国新冠疫情数据报告</title>
+<style>
+    body {{ font-family: "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif; color: #343a40;
+            background-color: #f8f9fa; max-width: 1200px; margin: 0 auto; padding: 20px; }}
+    h1 {{ color: #2c3e50; }}
+    section {{ background-color: white; padding: 15px; border-radius: 10px; margin-bottom: 20px;
+               box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1); }}
+    img {{ max-width: 100%; }}
+    .error {{ color: #e74c3c; }}
+</style>
+</head>
+<body>
+<h1>中国新冠疫情数据报告</h1>
+<p>数据截至 {data.time_points[-1].replace('_', '/')} | 生成时间 {time.strftime('%Y-%m-%d %H:%M:%S')}</p>
+{''.join(sections)}
+</body>
+</html>
+''')
+
+
+def write_pdf(path, tasks, results, figure_dir):
+    """把已生成的图片按顺序汇总为一个 PDF"""
+    plt = _pyplot()
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    with PdfPages(path) as pdf:
+        for task in tasks:
+            if results[task.name]['error']:
+                continue
+            image = plt.imread(os.path.join(figure_dir, f'{task.name}.png'))
+            height, width = image.shape[:2]
+            fig = plt.figure(figsize=(11.69, 11.69 * height / width))
+            ax = fig.add_axes([0, 0, 1, 1])
+            ax.imshow(image)
+            ax.set_axis_off()
+            pdf.savefig(fig)
+            plt.close(fig)
+
+
+def build_report(output_dir=OUTPUT_DIR, workers=None, pdf=False, force=False,
+                 data_dir=DATA_DIR, data_path=data_store.DATA_PATH, map_path=covid_cluster.shp_path):
+    """生成报告，返回 {任务名: {'hash', 'seconds', 'error', 'skipped'}}"""
+    start = time.perf_counter()
+    tasks = declare_tasks(data_dir, data_path, map_path)
+    figure_dir = os.path.join(output_dir, 'figures')
+    os.makedirs(figure_dir, exist_ok=True)
+
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    # 使用的中文字体参与哈希：安装字体后已生成的图表会重新绘制
+    code_hash = _code_hash() + (cjk_font() or '')
+    digests = {}
+    results = {}
+    pending = []
+    for task in tasks:
+        digest = task_hash(task, code_hash, digests)
+        previous = manifest.get(task.name)
+        output = os.path.join(figure_dir, f'{task.name}.png')
+        if previous and previous['hash'] == digest and not previous['error'] and os.path.exists(output):
+            results[task.name] = dict(previous, skipped=True)
+        else:
+            pending.append((task, digest, output))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(task, digest, pool.submit(_run_task, task.render, output, task.params))
+                       for task, digest, output in pending]
+            for task, digest, future in futures:
+                seconds, error = future.result()
+                results[task.name] = {'hash': digest, 'seconds': round(seconds, 3), 'error': error, 'skipped': False}
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({name: {k: v for k, v in result.items() if k != 'skipped'}
+                   for name, result in results.items()}, f, ensure_ascii=False, indent=2)
+
+    write_html(os.path.join(output_dir, 'index.html'), tasks, results, data_path)
+    if pdf:
+        write_pdf(os.path.join(output_dir, 'report.pdf'), tasks, results, figure_dir)
+
+    rendered = sum(not result['skipped'] for result in results.values())
+    print(f"报告已生成: {os.path.join(output_dir, 'index.html')}")
+    print(f"  重新绘制 {rendered} 个图表，跳过未变化的 {len(results) - rendered} 个，"
+          f"用时 {time.perf_counter() - start:.2f} 秒")
+    for name, result in results.items():
+        if result['error']:
+            print(f"  {name} 失败: {result['error']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并行生成静态疫情数据报告")
+    parser.add_argument('--output', default=OUTPUT_DIR, help="报告输出目录")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="快照 CSV 所在目录")
+    parser.add_argument('--data', default=data_store.DATA_PATH, help="merged_province_data.csv 路径")
+    parser.add_argument('--map', default=covid_cluster.shp_path, help="省界 shapefile 路径")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认为 CPU 核数")
+    parser.add_argument('--pdf', action='store_true', help="同时输出 report.pdf")
+    parser.add_argument('--force', action='store_true', help="忽略缓存，重新绘制所有图表")
+    args = parser.parse_args()
+    build_report(args.output, args.workers, args.pdf, args.force, args.data_dir, args.data, args.map)
+
+
+if __name__ == '__main__':
+    main()